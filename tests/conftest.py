@@ -0,0 +1,13 @@
+import os
+import sys
+
+import pytest
+
+# the app is a single script under versions/; it imports tkinter and daft at the top
+pytest.importorskip("tkinter")
+pytest.importorskip("daft")
+
+import matplotlib  # noqa: E402
+
+matplotlib.use("Agg")
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), os.pardir, "versions"))
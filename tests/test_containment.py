@@ -0,0 +1,78 @@
+""" ContainmentIndex must answer exactly like a brute-force scan, also after incremental sync() """
+import random
+
+import pytest
+
+import glmappy_b1 as g
+
+
+def _scene(rng, n_nodes, n_plates, span):
+    nodes = [{"x": rng.uniform(0, span), "y": rng.uniform(0, span)} for _ in range(n_nodes)]
+    plates = []
+    for _ in range(n_plates):
+        w, h = rng.uniform(0.05, 0.5) * span, rng.uniform(0.05, 0.5) * span
+        plates.append({"rect": [rng.uniform(0, span - w), rng.uniform(0, span - h), w, h]})
+    return nodes, plates
+
+
+def _edit(rng, nodes, plates, span):
+    for n in rng.sample(nodes, len(nodes) // 3):
+        n["x"], n["y"] = rng.uniform(-0.2 * span, 1.2 * span), rng.uniform(0, span)
+    for p in rng.sample(plates, len(plates) // 3):
+        p["rect"] = [p["rect"][0] + rng.uniform(-0.1, 0.1) * span, p["rect"][1], p["rect"][2] * rng.uniform(0.5, 1.5),
+                     p["rect"][3]]
+    del nodes[rng.randrange(len(nodes))]
+    del plates[rng.randrange(len(plates))]
+    more_nodes, more_plates = _scene(rng, 5, 2, span)
+    nodes += more_nodes
+    plates += more_plates
+
+
+def _check(index, nodes, plates, rng, span):
+    for _ in range(30):
+        x0, y0 = rng.uniform(-0.5 * span, span), rng.uniform(-0.5 * span, span)
+        rect = [x0, y0, rng.uniform(0, span), rng.uniform(0, span)]
+        assert index.nodes_in_rect(rect) == [i for i, n in enumerate(nodes)
+                                             if g._rect_contains_point(rect, n["x"], n["y"])]
+        assert index.plates_in_rect(rect) == [j for j, p in enumerate(plates)
+                                              if g._rect_contains_rect(rect, p["rect"])]
+    for n in nodes:
+        hits = [j for j, p in enumerate(plates) if g._rect_contains_point(p["rect"], n["x"], n["y"])]
+        assert sorted(index.plates_at(n["x"], n["y"])) == hits
+    for j, p in enumerate(plates):
+        outer = [k for k, q in enumerate(plates) if k != j and g._rect_contains_rect(q["rect"], p["rect"])]
+        parent = index.parent(j)
+        if outer:
+            assert parent in outer
+            assert g._rect_area(plates[parent]["rect"]) == min(g._rect_area(plates[k]["rect"]) for k in outer)
+        else:
+            assert parent is None
+
+
+@pytest.mark.parametrize("span", [8.0, 20.0, 1500.0])
+def test_index_matches_brute_force_after_sync(span):
+    rng = random.Random(int(span))
+    nodes, plates = _scene(rng, 60, 12, span)
+    index = g.ContainmentIndex(nodes, plates)
+    _check(index, nodes, plates, rng, span)
+    for _ in range(5):
+        _edit(rng, nodes, plates, span)
+        index.sync(nodes, plates)
+        _check(index, nodes, plates, rng, span)
+    fresh = g.ContainmentIndex(nodes, plates, cell=index.cell)
+    assert fresh._node_cells == index._node_cells and fresh._plate_cells == index._plate_cells
+
+
+def test_plates_at_orders_innermost_first():
+    plates = [{"rect": [0, 0, 10, 10]}, {"rect": [1, 1, 2, 2]}, {"rect": [0.5, 0.5, 5, 5]}]
+    index = g.ContainmentIndex([], plates)
+    assert index.plates_at(1.5, 1.5) == [1, 2, 0]
+    assert index.parent(1) == 2 and index.parent(2) == 0 and index.parent(0) is None
+    assert index.children(0) == [2]
+
+
+def test_empty_index():
+    index = g.ContainmentIndex([], [])
+    assert index.nodes_in_rect([0, 0, 5, 5]) == [] and index.plates_at(1, 1) == []
+    index.sync([{"x": 1.0, "y": 1.0}], [])
+    assert index.nodes_in_rect([0, 0, 5, 5]) == [0]
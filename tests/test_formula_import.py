@@ -0,0 +1,76 @@
+""" Formula and table import: parsing, the diagram it produces, and batch validation """
+import pytest
+
+import glmappy_b1 as g
+
+
+def _names(nodes):
+    return {n['name'] for n in nodes}
+
+
+def test_function_calls_stay_one_term():
+    model = g.parse_formula("y ~ log(x + 1) + exp(a*b) - 1")
+    assert model['fixed'] == ["log(x + 1)", "exp(a*b)"]
+    assert not model['intercept']
+    nodes, edges, _ = g.formula_to_elements("y ~ log(x + 1)")
+    assert "log(x + 1)" in _names(nodes)
+    assert g.validate_import([], nodes, edges) == []
+
+
+def test_interaction_expands():
+    assert g.parse_formula("y ~ a*b")['fixed'] == ["a", "b", "a:b"]
+
+
+@pytest.mark.parametrize("formula", ["y ~ log(x", "y ~ x)", "y x", "~ x", "y ~ x | g"])
+def test_malformed_formula_is_rejected(formula):
+    with pytest.raises(ValueError):
+        g.parse_formula(formula)
+
+
+def test_correlated_random_effects_share_one_sigma():
+    nodes, edges, plates = g.formula_to_elements("y ~ x + (1 + x | g)")
+    assert {"u_g", "b_x_g", "sigma_g"} <= _names(nodes)
+    assert {(e['source'], e['target']) for e in edges} >= {("sigma_g", "u_g"), ("sigma_g", "b_x_g")}
+    assert [p['label'] for p in plates][1:] == ["g"]
+
+
+def test_uncorrelated_random_effects_get_one_sigma_each():
+    model = g.parse_formula("y ~ x + (1 + x || g)")
+    assert model['random'] == [{'group': "g", 'terms': ["x"], 'intercept': True, 'correlated': False}]
+    nodes, edges, _ = g.formula_to_elements("y ~ x + (1 + x || g)")
+    names = _names(nodes)
+    assert {"u_g", "b_x_g", "sigma_u_g", "sigma_b_x_g"} <= names
+    assert "sigma_g" not in names and not any("|" in name for name in names)
+    assert {(e['source'], e['target']) for e in edges} >= {("sigma_u_g", "u_g"), ("sigma_b_x_g", "b_x_g")}
+    assert g.validate_import([], nodes, edges) == []
+
+
+def test_layout_stays_on_canvas():
+    nodes, _, plates = g.formula_to_elements("y ~ x + (1 + a + b + c + d | g)")
+    assert min(n['y'] for n in nodes) > 0
+    assert min(p['rect'][1] for p in plates) >= 0.5
+
+
+def test_table_import_rejects_bad_rows(tmp_path):
+    table = tmp_path / "nodes.csv"
+    table.write_text("name,x,y,fill\na,1,2,white\nb,inf,2,white\nc,nan,2,white\nd,1,2,blurple\ne,one,2,white\n")
+    nodes, edges, errors = g.read_element_table(str(table))
+    assert len(errors) == 1 and "line 6" in errors[0]
+    problems = g.validate_import([], nodes, edges)
+    assert len(problems) == 3
+    assert any("'b'" in p and "finite" in p for p in problems)
+    assert any("'c'" in p and "finite" in p for p in problems)
+    assert any("blurple" in p for p in problems)
+
+
+def test_edge_table_may_precede_node_table(tmp_path):
+    (tmp_path / "e.csv").write_text("source,target\na,b\n")
+    (tmp_path / "n.csv").write_text("name,x,y\na,1,1\nb,2,1\n")
+    nodes, edges = [], []
+    for name in ("e.csv", "n.csv"):
+        n, e, errors = g.read_element_table(str(tmp_path / name))
+        assert errors == []
+        nodes += n
+        edges += e
+    assert g.validate_import([], nodes, edges) == []
+    assert g.validate_import([{"name": "a"}], nodes, edges) == ["Duplicate node name 'a'"]
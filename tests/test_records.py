@@ -0,0 +1,83 @@
+""" NodeRecord/EdgeRecord must behave like the plain dicts they replace """
+import copy
+import json
+import pickle
+
+import pytest
+
+import glmappy_b1 as g
+
+NODE = dict(g.NODE_DEFAULTS, name="x", label="$x$", x=1.0, y=2.5)
+
+
+def test_record_reads_like_a_dict():
+    node = g.NodeRecord(NODE)
+    assert node == NODE and NODE == node
+    assert node["x"] == 1.0 and node.get("fill") == "white" and node.get("missing", 3) == 3
+    assert "shape" in node and "missing" not in node
+    assert len(node) == len(NODE) and set(node) == set(NODE)
+    assert node.to_dict() == NODE and type(node.to_dict()) is dict
+    with pytest.raises(KeyError):
+        node["missing"]
+
+
+def test_unset_fields_are_absent():
+    edge = g.EdgeRecord(source="a", target="b")
+    assert dict(edge) == {"source": "a", "target": "b"}
+    assert "rad" not in edge and edge.get("rad", 0.0) == 0.0
+    with pytest.raises(KeyError):
+        edge["rad"]
+    with pytest.raises(KeyError):
+        del edge["rad"]
+    edge.setdefault("rad", 0.3)
+    assert edge["rad"] == 0.3
+    del edge["rad"]
+    assert "rad" not in edge and len(edge) == 2
+
+
+def test_unknown_keys_are_kept():
+    node = g.NodeRecord(NODE, note="kept", tags=["a"])
+    assert node["note"] == "kept" and list(node)[-2:] == ["note", "tags"]
+    assert json.loads(json.dumps(g.plain_elements([node])))[0] == dict(NODE, note="kept", tags=["a"])
+    del node["note"]
+    assert "note" not in node
+    with pytest.raises(KeyError):
+        del node["note"]
+    node.update(x=4.0, extra=1)
+    assert node["x"] == 4.0 and node["extra"] == 1
+
+
+def test_interned_strings_are_shared():
+    a = g.EdgeRecord(source="".join(["al", "pha"]), target="b", color="".join(["re", "d"]))
+    b = g.EdgeRecord(source="alpha", target="b", color="red")
+    assert a["source"] is b["source"] and a["color"] is b["color"]
+
+
+@pytest.mark.parametrize("clone", [lambda r: r.copy(), copy.copy, copy.deepcopy,
+                                   lambda r: g.snapshot_elements([r])[0]])
+def test_copies_are_independent(clone):
+    node = g.NodeRecord(NODE, note="n")
+    other = clone(node)
+    assert type(other) is g.NodeRecord and other == node
+    other["x"] = 9.0
+    other["note"] = "changed"
+    other["added"] = True
+    del other["label"]
+    assert node == dict(NODE, note="n")
+
+
+def test_deepcopy_copies_mutable_extras():
+    node = g.NodeRecord(NODE, tags=["a"])
+    other = copy.deepcopy(node)
+    other["tags"].append("b")
+    assert node["tags"] == ["a"]
+
+
+def test_as_nodes_and_plain_elements_round_trip():
+    plain = [NODE, dict(NODE, name="y", fill="gray", style_hint="x")]
+    records = g.as_nodes(plain)
+    assert all(isinstance(r, g.NodeRecord) for r in records)
+    assert g.as_nodes(records)[0] is records[0]
+    assert g.plain_elements(records) == plain
+    assert g.as_edges([{"source": "x", "target": "y"}])[0] == {"source": "x", "target": "y"}
+    assert pickle.loads(pickle.dumps(records)) == plain
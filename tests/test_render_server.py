@@ -0,0 +1,52 @@
+""" Render requests are validated up front so malformed bodies get a 400, not a worker traceback """
+import json
+
+import pytest
+
+import glmappy_b1 as g
+
+PROJECT = {
+    "nodes": [{"name": "x", "label": "$x$", "x": 1.0, "y": 1.0}, {"name": "y", "label": "$y$", "x": 2.0, "y": 1.0}],
+    "edges": [{"source": "x", "target": "y"}],
+    "plates": [{"rect": [0.3, 0.3, 2.5, 1.4], "label": "n", "position": "bottom right"}],
+    "settings": {"canvas_width": 4.0, "canvas_height": 3.0, "canvas_unit": "in", "font_color": "black"},
+}
+
+
+def _with(path, value):
+    project = json.loads(json.dumps(PROJECT))
+    *keys, last = path
+    target = project
+    for key in keys:
+        target = target[key]
+    target[last] = value
+    return project
+
+
+def test_valid_project_gets_defaults():
+    project = g.check_render_project(PROJECT)
+    assert project["nodes"][0]["scale"] == g.NODE_DEFAULTS["scale"]
+    assert project["edges"][0]["style"] == "Solid"
+
+
+@pytest.mark.parametrize("path, value, message", [
+    (("settings", "font_color"), "blurple", "font colour"),
+    (("plates", 0, "position"), "weird", "position must be one of"),
+    (("plates", 0, "rect"), [0, 0, 1], "rect"),
+    (("nodes", 0, "x"), float("inf"), "finite"),
+    (("nodes", 0, "fill"), "notacolor", "fill colour"),
+    (("nodes", 0, "label"), 5, "label must be a string"),
+    (("edges", 0, "target"), "missing", "unknown target"),
+    (("edges", 0, "color"), "blurple", "colour"),
+    (("nodes",), 5, "list of objects"),
+])
+def test_malformed_project_is_rejected(path, value, message):
+    with pytest.raises(ValueError, match=message):
+        g.check_render_project(_with(path, value))
+
+
+@pytest.mark.parametrize("dpi", [float("nan"), 5, g.MAX_RENDER_DPI + 1])
+def test_raster_dpi_is_bounded(dpi):
+    with pytest.raises(ValueError, match="dpi"):
+        g.check_render_project(PROJECT, "png", dpi)
+    g.check_render_project(PROJECT, "svg", dpi)  # vector output ignores dpi
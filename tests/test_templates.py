@@ -0,0 +1,71 @@
+""" Template expansion and parameter tables for batch variants """
+import pytest
+
+import glmappy_b1 as g
+
+TEMPLATE = {
+    "parameters": {"n": 3, "dx": 1.5, "title": "model"},
+    "nodes": [{"name": "y", "label": "{{title}}", "x": "1 + {{dx}} * {{n}}", "y": 1.0, "observed": True}],
+    "repeat": [{"var": "i", "start": 1, "count": "{{n}}",
+                "nodes": [{"name": "x{{i}}", "label": "$x_{{{i}}}$", "x": "{{dx}} * {{i}}", "y": 3}],
+                "edges": [{"source": "x{{i}}", "target": "y"}]}],
+    "settings": {"canvas_width": "2 + {{n}}", "font": "serif"},
+}
+
+
+def test_expand_template_defaults():
+    project = g.expand_template(TEMPLATE)
+    assert [n["name"] for n in project["nodes"]] == ["y", "x1", "x2", "x3"]
+    assert project["nodes"][0]["label"] == "model"
+    assert project["nodes"][0]["x"] == pytest.approx(5.5)
+    assert project["nodes"][0]["observed"] is True
+    assert [n["x"] for n in project["nodes"][1:]] == pytest.approx([1.5, 3.0, 4.5])
+    assert project["nodes"][2]["label"] == "$x_{2}$"
+    assert [(e["source"], e["target"]) for e in project["edges"]] == [("x1", "y"), ("x2", "y"), ("x3", "y")]
+    assert project["settings"] == {"canvas_width": 5, "font": "serif"}
+
+
+def test_expand_template_row_overrides_defaults():
+    project = g.expand_template(TEMPLATE, {"n": 1, "title": "other"})
+    assert [n["name"] for n in project["nodes"]] == ["y", "x1"]
+    assert project["nodes"][0]["label"] == "other"
+
+
+def test_expand_template_nested_repeat():
+    template = {"repeat": [{"var": "i", "count": 2, "repeat": [
+        {"var": "j", "start": 0, "count": "{{i}}", "nodes": [{"name": "n{{i}}_{{j}}", "x": "{{i}}", "y": "{{j}}"}]}]}]}
+    project = g.expand_template(template)
+    assert [(n["name"], n["x"], n["y"]) for n in project["nodes"]] == [("n1_0", 1, 0), ("n2_0", 2, 0), ("n2_1", 2, 1)]
+
+
+def test_missing_parameter_is_named():
+    with pytest.raises(ValueError, match="'missing' is not defined"):
+        g.expand_template({"nodes": [{"name": "{{missing}}", "x": 1, "y": 1}]})
+
+
+@pytest.mark.parametrize("expr", ["__import__('os')", "x.real", "[1, 2]", "2 ** 1000", "10 ** 10 ** 10",
+                                  "(10 ** 60) ** 60 ** 2", "{{title}} * 2"])
+def test_unsafe_or_unbounded_expressions_are_rejected(expr):
+    with pytest.raises(ValueError):
+        g.expand_template({"parameters": {"x": 1, "title": "ab"}, "nodes": [{"name": "a", "x": expr, "y": 1}]})
+
+
+def test_small_powers_still_work():
+    project = g.expand_template({"parameters": {"k": 3}, "nodes": [{"name": "a", "x": "2 ** {{k}}", "y": "0.5 ** 2"}]})
+    assert (project["nodes"][0]["x"], project["nodes"][0]["y"]) == (8, 0.25)
+
+
+def test_parameter_table_names_are_safe_and_unique(tmp_path):
+    table = tmp_path / "rows.csv"
+    table.write_text("variant,n,flag,title\n"
+                     "a/b,2,true,first\n"
+                     "a_b,3,false,\n"
+                     "../A_B,1,TRUE,x\n"
+                     ",4,,y\n"
+                     "a_b_2,5,,z\n")
+    rows = g.read_parameter_table(str(table))
+    assert [name for name, _ in rows] == ["a_b", "a_b_2", "A_B_3", "variant_004", "a_b_2_2"]
+    assert len({name.lower() for name, _ in rows}) == len(rows)
+    assert rows[0][1] == {"n": 2, "flag": True, "title": "first"}
+    assert rows[1][1] == {"n": 3, "flag": False}
+    assert rows[3][1] == {"n": 4, "title": "y"}
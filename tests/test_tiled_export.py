@@ -0,0 +1,70 @@
+""" Strip-rendered PNG/TIFF export must match a whole-figure savefig pixel for pixel """
+import io
+
+import matplotlib.pyplot as plt
+import numpy as np
+import pytest
+
+import glmappy_b1 as g
+
+PROJECT = {
+    "nodes": [dict(g.NODE_DEFAULTS, name="x", label="$x_i$", x=1.0, y=2.0, observed=True, fill="#ddeeff"),
+              dict(g.NODE_DEFAULTS, name="y", label="$y_i$", x=3.0, y=1.0, shape="rectangle", aspect=1.3)],
+    "edges": [dict(g.EDGE_DEFAULTS, source="x", target="y", style="Dashed", color="red")],
+    "plates": [{"rect": [0.3, 0.3, 3.5, 2.4], "label": "n", "position": "bottom right"}],
+    "settings": {"font": "serif", "font_size": 11, "font_color": "black", "canvas_width": 3.0,
+                 "canvas_height": 2.0, "canvas_unit": "in", "show_grid": False},
+}
+
+
+@pytest.fixture
+def fig():
+    fig = g.build_project_figure(PROJECT)
+    yield fig
+    plt.close(fig)
+
+
+def _savefig_rgba(fig, dpi, bbox_inches):
+    buf = io.BytesIO()
+    fig.savefig(buf, format="png", dpi=dpi, bbox_inches=bbox_inches)
+    buf.seek(0)
+    return np.round(plt.imread(buf) * 255).astype(int)
+
+
+@pytest.mark.parametrize("dpi, strip_px, bbox_inches", [(157, 512, "tight"), (300, 128, "tight"),
+                                                       (300, 97, None), (1000, 333, "tight")])
+def test_tiled_png_matches_savefig(tmp_path, fig, dpi, strip_px, bbox_inches):
+    reference = _savefig_rgba(fig, dpi, bbox_inches)
+    path = str(tmp_path / "out.png")
+    g.save_figure_tiled(fig, path, dpi=dpi, bbox_inches=bbox_inches, strip_px=strip_px)
+    tiled = np.round(plt.imread(path) * 255).astype(int)
+    assert tiled.shape == reference.shape
+    assert np.abs(tiled - reference).max() <= 1
+
+
+@pytest.mark.parametrize("dpi, strip_px", [(157, 512), (300, 100), (1000, 4096)])
+def test_tiled_tiff_matches_savefig(tmp_path, fig, dpi, strip_px):
+    Image = pytest.importorskip("PIL.Image")
+    reference = _savefig_rgba(fig, dpi, "tight")
+    path = str(tmp_path / "out.tif")
+    g.save_figure_tiled(fig, path, dpi=dpi, strip_px=strip_px)
+    with Image.open(path) as im:
+        assert im.mode == "RGBA"
+        assert im.info["dpi"] == pytest.approx((dpi, dpi))
+        tiled = np.asarray(im).astype(int)
+    assert tiled.shape == reference.shape
+    assert np.abs(tiled - reference).max() <= 1
+
+
+def test_tiled_png_records_dpi(tmp_path, fig):
+    Image = pytest.importorskip("PIL.Image")
+    path = str(tmp_path / "out.png")
+    g.save_figure_tiled(fig, path, dpi=300, strip_px=64)
+    with Image.open(path) as im:
+        assert im.info["dpi"] == pytest.approx((300, 300), abs=0.1)
+
+
+def test_other_formats_fall_back_to_savefig(tmp_path, fig):
+    path = tmp_path / "out.svg"
+    g.save_figure_tiled(fig, str(path), dpi=300)
+    assert path.read_bytes().lstrip().startswith(b"<?xml")
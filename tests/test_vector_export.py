@@ -0,0 +1,91 @@
+""" The native SVG/PDF writer must draw the same diagram, at the same size, as build_project_figure """
+import io
+
+import matplotlib.pyplot as plt
+import numpy as np
+import pytest
+from matplotlib.patches import PathPatch
+from matplotlib.path import Path
+
+import glmappy_b1 as g
+
+DPI = 100
+CODES = {"M": (Path.MOVETO,), "L": (Path.LINETO,), "Q": (Path.CURVE3,) * 2, "C": (Path.CURVE4,) * 3}
+
+
+def _node(name, label, x, y, **kw):
+    return dict(g.NODE_DEFAULTS, name=name, label=label, x=x, y=y, **kw)
+
+
+def _edge(source, target, **kw):
+    return dict(g.EDGE_DEFAULTS, source=source, target=target, **kw)
+
+
+PROJECT = {
+    "nodes": [_node("x", "$x_i$", 1.0, 3.0, observed=True, fill="#eeeeee"),
+              _node("eta", r"$\eta$", 3.0, 3.0),
+              _node("y", "$y_i$", 3.0, 1.0, observed=True),
+              _node("s", r"$\sigma^2$", 5.5, 1.0, shape="rectangle", aspect=1.4, linewidth=2.0)],
+    "edges": [_edge("x", "eta"), _edge("eta", "y", style="Dashed"), _edge("s", "y", color="red")],
+    "plates": [{"rect": [0.3, 0.3, 3.5, 3.5], "label": "n", "position": "bottom right"}],
+    "settings": {"font": "serif", "font_size": 12, "font_color": "black", "canvas_width": 7.0,
+                 "canvas_height": 4.5, "canvas_unit": "in", "show_grid": False},
+}
+
+
+def _path(cmds, dx=0.0, dy=0.0):
+    verts, codes = [], []
+    for cmd in cmds:
+        if cmd[0] == "Z":
+            verts.append((0.0, 0.0))
+            codes.append(Path.CLOSEPOLY)
+            continue
+        pts = cmd[1:]
+        verts += [(pts[i] + dx, pts[i + 1] + dy) for i in range(0, len(pts), 2)]
+        codes += CODES[cmd[0]]
+    return Path(verts, codes)
+
+
+def _raster(fig, **kw):
+    buf = io.BytesIO()
+    fig.savefig(buf, format="png", dpi=DPI, **kw)
+    plt.close(fig)
+    buf.seek(0)
+    return plt.imread(buf)
+
+
+def _native_raster(project):
+    scene = g._VectorScene(project)
+    x0, y0, x1, y1 = scene.bbox
+    fig = plt.figure(figsize=((x1 - x0) / 72.0, (y1 - y0) / 72.0))
+    ax = fig.add_axes([0, 0, 1, 1])
+    ax.set_xlim(x0, x1)
+    ax.set_ylim(y0, y1)
+    ax.axis("off")
+    for item in scene.items:
+        if item[0] == "path":
+            _, cmds, stroke, fill, lw, _ = item
+            ax.add_patch(PathPatch(_path(cmds), fc=fill or "none", ec=stroke or "none", lw=lw))
+        else:
+            _, gid, tx, ty, rgb = item
+            ax.add_patch(PathPatch(_path(scene.glyphs[gid][0], tx, ty), fc=rgb, ec="none"))
+    return _raster(fig)
+
+
+def _ink_extent(image):
+    ys, xs = np.nonzero(image[..., :3].min(axis=2) < 0.98)
+    return xs.max() - xs.min(), ys.max() - ys.min()
+
+
+def test_native_scene_matches_matplotlib_size():
+    reference = _raster(g.build_project_figure(PROJECT), bbox_inches="tight")
+    native = _native_raster(PROJECT)
+    (rw, rh), (nw, nh) = _ink_extent(reference), _ink_extent(native)
+    assert abs(rw - nw) <= 3 and abs(rh - nh) <= 3
+
+
+def test_model_unit_is_grid_unit_centimetres():
+    # daft sizes its figure as shape * grid_unit / 2.54 inches, so a scale-1 node is 1/2.54 in across
+    project = {"nodes": [_node("a", "", 1.0, 1.0)], "edges": [], "plates": [], "settings": {"canvas_unit": "in"}}
+    x0, y0, x1, y1 = g._VectorScene(project).bbox
+    assert (x1 - x0) - 2 * g.VECTOR_PAD_PT == pytest.approx(72.0 / 2.54, abs=1.5)
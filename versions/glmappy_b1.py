@@ -1,8 +1,9 @@
 import tkinter as tk
-from tkinter import ttk, messagebox, scrolledtext, Menu, filedialog
+from tkinter import ttk, messagebox, scrolledtext, Menu, filedialog, simpledialog
 import matplotlib
 import matplotlib.pyplot as plt
 from matplotlib.backends.backend_tkagg import FigureCanvasTkAgg, NavigationToolbar2Tk
+from matplotlib.backends.backend_agg import RendererAgg
 import daft
 import copy
 import math
@@ -11,13 +12,37 @@ import io
 import json
 import os
 import sys
+import re
+import ast
+import csv
+import time
+import zlib
+import struct
+import pickle
+import string
+import hashlib
+import functools
+import threading
+import queue
+import argparse
+import multiprocessing
+from collections import deque
+from collections.abc import MutableMapping
+from concurrent.futures import ProcessPoolExecutor
+from http.server import ThreadingHTTPServer, BaseHTTPRequestHandler
+from urllib.parse import urlparse, parse_qs
+from matplotlib import cbook
+from matplotlib import colors as mcolors
+from matplotlib.font_manager import FontProperties
+from matplotlib.path import Path
+from matplotlib.transforms import Bbox
+from matplotlib.patches import Ellipse, Rectangle
+from matplotlib.textpath import TextPath, text_to_path
 
 # Copyright © 2026 Erik Skogsberg-De La O
 # Licensed under the MIT License. See LICENSE file in the project root.
 # See license.txt and third_party_notices.txt for details.
 
-matplotlib.use("TkAgg")
-
 def resource_path(relative_path):
     """ Get absolute path to resource, works for dev and for PyInstaller """
     try:
@@ -26,6 +51,1939 @@ def resource_path(relative_path):
         base_path = os.path.abspath(".")
     return os.path.join(base_path, relative_path)
 
+FONT_OPTIONS = ["serif", "sans-serif", "monospace", "Times New Roman", "Arial"]
+PLATE_POSITIONS = ["bottom right", "bottom left", "top right", "top left"]
+EDGE_STYLES = {"Solid": "-", "Dashed": "--", "Dotted": ":", "Dash-Dot": "-."}
+
+
+# -----------------------------------------------------------------------------
+# ELEMENT STORAGE
+# Nodes and edges live in __slots__ records instead of ten-key dicts. They keep
+# the dict interface (n['x'], n.get('fill', 'white'), 'rad' in e) so the
+# rendering, code generation and save paths are unchanged, but each copy in
+# the undo/redo history is a flat slot copy, and repeated style/colour strings
+# are interned so every record points at the same string object.
+# -----------------------------------------------------------------------------
+class _Record(MutableMapping):
+    __slots__ = ("_extra",)
+    _fields = ()
+    _interned = frozenset()
+
+    def __init__(self, data=(), **kwargs):
+        self._extra = None
+        for key, value in dict(data, **kwargs).items():
+            self[key] = value
+
+    def __getitem__(self, key):
+        if key in self._fields:
+            try:
+                return getattr(self, key)
+            except AttributeError:
+                raise KeyError(key) from None
+        if self._extra is not None and key in self._extra:
+            return self._extra[key]
+        raise KeyError(key)
+
+    def __setitem__(self, key, value):
+        if key in self._fields:
+            if key in self._interned and type(value) is str:
+                value = sys.intern(value)
+            setattr(self, key, value)
+        else:
+            # keys this version doesn't know about are kept so they survive a save
+            if self._extra is None:
+                self._extra = {}
+            self._extra[key] = value
+
+    def __delitem__(self, key):
+        if key in self._fields:
+            try:
+                delattr(self, key)
+            except AttributeError:
+                raise KeyError(key) from None
+        elif self._extra is not None and key in self._extra:
+            del self._extra[key]
+        else:
+            raise KeyError(key)
+
+    def __iter__(self):
+        for key in self._fields:
+            if hasattr(self, key):
+                yield key
+        if self._extra:
+            yield from self._extra
+
+    def __len__(self):
+        return sum(1 for _ in self)
+
+    def __repr__(self):
+        return f"{type(self).__name__}({self.to_dict()!r})"
+
+    def to_dict(self):
+        return {key: self[key] for key in self}
+
+    def copy(self):
+        clone = object.__new__(type(self))
+        for key in self._fields:
+            try:
+                setattr(clone, key, getattr(self, key))
+            except AttributeError:
+                pass
+        clone._extra = dict(self._extra) if self._extra else None
+        return clone
+
+    __copy__ = copy
+
+    def __deepcopy__(self, memo):
+        # every field holds an immutable scalar, so a slot copy is already a deep copy
+        clone = self.copy()
+        if clone._extra:
+            clone._extra = copy.deepcopy(clone._extra, memo)
+        return clone
+
+
+class NodeRecord(_Record):
+    _fields = ('name', 'label', 'x', 'y', 'scale', 'linewidth', 'observed', 'fill', 'shape', 'aspect')
+    _interned = frozenset({'fill', 'shape'})
+    __slots__ = _fields
+
+
+class EdgeRecord(_Record):
+    _fields = ('source', 'target', 'style', 'head_width', 'head_length', 'rad', 'gap_start', 'gap_end',
+               'double_head', 'color')
+    _interned = frozenset({'source', 'target', 'style', 'color'})
+    __slots__ = _fields
+
+
+def as_nodes(nodes):
+    return [n if isinstance(n, NodeRecord) else NodeRecord(n) for n in nodes]
+
+
+def as_edges(edges):
+    return [e if isinstance(e, EdgeRecord) else EdgeRecord(e) for e in edges]
+
+
+def snapshot_elements(elements):
+    """ Independent copy of an element list for the undo/redo history """
+    return [e.copy() if isinstance(e, _Record) else copy.deepcopy(e) for e in elements]
+
+
+def plain_elements(elements):
+    """ Plain dicts for JSON and for pickling to worker processes """
+    return [e.to_dict() if isinstance(e, _Record) else e for e in elements]
+
+
+def _deep_sizeof(obj, seen):
+    if id(obj) in seen:
+        return 0
+    seen.add(id(obj))
+    size = sys.getsizeof(obj)
+    if isinstance(obj, dict):
+        size += sum(_deep_sizeof(k, seen) + _deep_sizeof(v, seen) for k, v in obj.items())
+    elif isinstance(obj, (list, tuple)):
+        size += sum(_deep_sizeof(v, seen) for v in obj)
+    elif isinstance(obj, _Record):
+        size += sum(_deep_sizeof(getattr(obj, k), seen) for k in obj._fields if hasattr(obj, k))
+        if obj._extra:
+            size += _deep_sizeof(obj._extra, seen)
+    return size
+
+
+def element_memory_report(nodes, edges):
+    """ Bytes per node/edge stored as plain dicts (as loaded from JSON) versus slot records """
+    report = {}
+    for kind, elements, record in (("node", nodes, NodeRecord), ("edge", edges, EdgeRecord)):
+        if not elements:
+            continue
+        # round-trip through JSON so the "before" side has the per-element strings a loaded project has
+        as_dicts = json.loads(json.dumps(plain_elements(elements)))
+        as_records = [record(d) for d in json.loads(json.dumps(plain_elements(elements)))]
+        before = _deep_sizeof(as_dicts, set()) - sys.getsizeof(as_dicts)
+        after = _deep_sizeof(as_records, set()) - sys.getsizeof(as_records)
+        report[kind] = {"count": len(elements), "dict_bytes": before / len(elements),
+                        "record_bytes": after / len(elements)}
+    return report
+
+
+# -----------------------------------------------------------------------------
+# HEADLESS RENDERING
+# Shared by the GUI and by worker processes; works on plain project dicts in
+# the same schema as save_project, with no Tk state involved.
+# -----------------------------------------------------------------------------
+def grid_unit_for(unit):
+    if unit == "cm":
+        return 1 / 2.54
+    elif unit == "mm":
+        return 1 / 25.4
+    elif unit == "px":
+        return 1 / 100.0
+    return 1.0
+
+
+def populate_pgm(pgm, nodes, edges, plates):
+    for p in plates:
+        pgm.add_plate(daft.Plate(p['rect'], label=p['label'], position=p['position']))
+
+    for n in nodes:
+        fill = n.get('fill', 'white')
+        if n['observed'] and fill == 'white': fill = "0.95"
+        shape = n.get('shape', 'circle')
+        aspect = n.get('aspect', 1.0)
+        lw = float(n['linewidth'])
+        plot_params = {'linewidth': lw, 'facecolor': fill, 'edgecolor': 'black'}
+        pgm.add_node(daft.Node(n['name'], n['label'], n['x'], n['y'],
+                               scale=n['scale'], aspect=aspect, shape=shape,
+                               observed=n['observed'], plot_params=plot_params))
+
+    for e in edges:
+        is_curved = (e.get('rad', 0.0) != 0.0 and e['source'] != e['target'])
+        edge_color = e.get('color', 'black')
+        if not edge_color: edge_color = 'black'
+        if is_curved:
+            line_code = EDGE_STYLES.get(e['style'], "-")
+            params = {"head_width": e.get('head_width', 0.45), "head_length": e.get('head_length', 0.45),
+                      "color": edge_color, "ec": edge_color, "fc": edge_color}
+            if line_code != "-": params["linestyle"] = line_code
+            params["connectionstyle"] = f"arc3, rad={e.get('rad')}"
+            pgm.add_edge(e['source'], e['target'], plot_params=params)
+
+
+def draw_manual_components(ax, nodes, edges):
+    node_lookup = {n['name']: n for n in nodes}
+    for e in edges:
+        is_curved = (e.get('rad', 0.0) != 0.0 and e['source'] != e['target'])
+        if not is_curved:
+            draw_manual_edge(ax, e, node_lookup)
+
+
+def draw_manual_edge(ax, edge, node_lookup):
+    node_a = node_lookup.get(edge['source'])
+    node_b = node_lookup.get(edge['target'])
+    if not node_a or not node_b: return
+
+    gap_start = edge.get('gap_start', 0.1)
+    gap_end = edge.get('gap_end', 0.1)
+    line_code = EDGE_STYLES.get(edge['style'], "-")
+    edge_color = edge.get('color', 'black')
+    if not edge_color: edge_color = 'black'
+    arrow_style = "<|-|>" if edge.get('double_head') else "-|>"
+    hw, hl = edge.get('head_width', 0.45), edge.get('head_length', 0.45)
+
+    if edge['source'] == edge['target']:
+        r = 0.4 * node_a['scale']
+        r_start, r_end = r + gap_start, r + gap_end
+        rad = edge.get('rad', 0.0)
+        if rad == 0.0:
+            rad = -2.5
+        else:
+            rad = -abs(rad)
+        phi_start, phi_end = math.radians(120), math.radians(60)
+        start_p = (node_a['x'] + r_start * math.cos(phi_start), node_a['y'] + r_start * math.sin(phi_start))
+        end_p = (node_a['x'] + r_end * math.cos(phi_end), node_a['y'] + r_end * math.sin(phi_end))
+        ax.annotate("", xy=end_p, xytext=start_p,
+                    arrowprops=dict(arrowstyle=f"{arrow_style},head_width={hw},head_length={hl}",
+                                    linestyle=line_code, connectionstyle=f"arc3,rad={rad}", linewidth=1.0,
+                                    shrinkA=0, shrinkB=0, color=edge_color))
+    else:
+        dx, dy = node_b['x'] - node_a['x'], node_b['y'] - node_a['y']
+        theta = math.atan2(dy, dx)
+        r_a = (0.4 * node_a['scale']) + gap_start
+        r_b = (0.4 * node_b['scale']) + gap_end
+        start_p = (node_a['x'] + r_a * math.cos(theta), node_a['y'] + r_a * math.sin(theta))
+        end_p = (node_b['x'] - r_b * math.cos(theta), node_b['y'] - r_b * math.sin(theta))
+        ax.annotate("", xy=end_p, xytext=start_p,
+                    arrowprops=dict(arrowstyle=f"{arrow_style},head_width={hw},head_length={hl}",
+                                    linestyle=line_code, linewidth=1.0, shrinkA=0, shrinkB=0, color=edge_color))
+
+
+def build_project_figure(project):
+    settings = project.get("settings", {})
+    canvas_width = settings.get("canvas_width", 10.0)
+    canvas_height = settings.get("canvas_height", 10.0)
+    plt.rc("font", family=settings.get("font", "serif"), size=settings.get("font_size", 12))
+    plt.rc("text", color=settings.get("font_color", "black"))
+    g_unit = grid_unit_for(settings.get("canvas_unit", "in"))
+    pgm = daft.PGM(shape=[canvas_width, canvas_height], origin=[0, 0], grid_unit=g_unit, node_unit=1.0)
+    nodes = project.get("nodes", [])
+    edges = project.get("edges", [])
+    populate_pgm(pgm, nodes, edges, project.get("plates", []))
+    pgm.render()
+    draw_manual_components(pgm.ax, nodes, edges)
+    if pgm.ax:
+        pgm.ax.set_xlim(0, canvas_width)
+        pgm.ax.set_ylim(0, canvas_height)
+        pgm.ax.set_aspect('equal')
+        pgm.ax.axis('off')
+    return pgm.figure
+
+
+# -----------------------------------------------------------------------------
+# NATIVE VECTOR EXPORT
+# Writes SVG/PDF straight from the node/edge/plate model, skipping the
+# matplotlib figure. Geometry is resolved to points once, the bounding box is
+# taken from the element extents (no second "tight" draw), and every distinct
+# label is emitted once as a glyph path and referenced on each reuse.
+# -----------------------------------------------------------------------------
+VECTOR_PAD_PT = 7.2  # same 0.1 in padding as bbox_inches='tight'
+_KAPPA = 0.5522847498
+_DASHES = {"--": [3.7, 1.6], ":": [1.0, 1.65], "-.": [6.4, 1.6, 1.0, 1.6]}
+
+
+def _rgb(color):
+    if color is None or str(color).lower() == "none":
+        return None
+    return mcolors.to_rgb(color)
+
+
+@functools.lru_cache(maxsize=2048)
+def _label_glyphs(label, family, size):
+    """ Outline a label once: returns (commands, width, height, descent) in points, baseline at y=0 """
+    prop = FontProperties(family=family, size=size)
+    w, h, d = text_to_path.get_text_width_height_descent(label, prop, ismath=cbook.is_math_text(label))
+    cmds = []
+    for verts, code in TextPath((0, 0), label, size=size, prop=prop).iter_segments(curves=True, simplify=False):
+        if code == Path.MOVETO:
+            cmds.append(("M", verts[0], verts[1]))
+        elif code == Path.LINETO:
+            cmds.append(("L", verts[0], verts[1]))
+        elif code == Path.CURVE3:
+            cmds.append(("Q",) + tuple(verts))
+        elif code == Path.CURVE4:
+            cmds.append(("C",) + tuple(verts))
+        elif code == Path.CLOSEPOLY:
+            cmds.append(("Z",))
+    return tuple(cmds), w, h, d
+
+
+def _ellipse_cmds(cx, cy, rx, ry):
+    kx, ky = _KAPPA * rx, _KAPPA * ry
+    return [("M", cx + rx, cy),
+            ("C", cx + rx, cy + ky, cx + kx, cy + ry, cx, cy + ry),
+            ("C", cx - kx, cy + ry, cx - rx, cy + ky, cx - rx, cy),
+            ("C", cx - rx, cy - ky, cx - kx, cy - ry, cx, cy - ry),
+            ("C", cx + kx, cy - ry, cx + rx, cy - ky, cx + rx, cy),
+            ("Z",)]
+
+
+def _rect_cmds(x, y, w, h):
+    return [("M", x, y), ("L", x + w, y), ("L", x + w, y + h), ("L", x, y + h), ("Z",)]
+
+
+def _quad_extent(p0, c, p2):
+    """ Exact per-axis extent of a quadratic Bezier (control points alone over-estimate it) """
+    lo, hi = [min(p0[i], p2[i]) for i in (0, 1)], [max(p0[i], p2[i]) for i in (0, 1)]
+    for i in (0, 1):
+        denom = p0[i] - 2 * c[i] + p2[i]
+        if denom:
+            t = (p0[i] - c[i]) / denom
+            if 0 < t < 1:
+                v = (1 - t) ** 2 * p0[i] + 2 * t * (1 - t) * c[i] + t * t * p2[i]
+                lo[i], hi[i] = min(lo[i], v), max(hi[i], v)
+    return lo, hi
+
+
+def _node_frontier(node, ux, uy, k):
+    """ Distance (pt) from a node's centre to its outline along the unit direction (ux, uy) """
+    a = 0.5 * node['scale'] * node.get('aspect', 1.0) * k
+    b = 0.5 * node['scale'] * k
+    if node.get('shape', 'circle') == 'rectangle':
+        return min(a / abs(ux) if ux else math.inf, b / abs(uy) if uy else math.inf)
+    return 1.0 / math.hypot(ux / a, uy / b)
+
+
+class _VectorScene:
+    """ Flattened drawing list in points (y up) plus its analytic bounding box """
+
+    def __init__(self, project):
+        settings = project.get("settings", {})
+        # daft treats grid_unit as centimetres: one model unit is grid_unit / 2.54 inches on the page
+        self.k = grid_unit_for(settings.get("canvas_unit", "in")) * 72.0 / 2.54
+        self.family = settings.get("font", "serif")
+        self.size = float(settings.get("font_size", 12))
+        self.text_rgb = _rgb(settings.get("font_color", "black"))
+        self.items = []
+        self.glyph_ids = {}
+        self.glyphs = []
+        self.bbox = [math.inf, math.inf, -math.inf, -math.inf]
+
+        nodes = project.get("nodes", [])
+        for p in project.get("plates", []):
+            self._add_plate(p)
+        for n in nodes:
+            self._add_node(n)
+        lookup = {n['name']: n for n in nodes}
+        for e in project.get("edges", []):
+            self._add_edge(e, lookup)
+
+        if not self.items:
+            self.bbox = [0.0, 0.0, 0.0, 0.0]
+        x0, y0, x1, y1 = self.bbox
+        self.bbox = [x0 - VECTOR_PAD_PT, y0 - VECTOR_PAD_PT, x1 + VECTOR_PAD_PT, y1 + VECTOR_PAD_PT]
+
+    def _grow(self, x0, y0, x1, y1):
+        b = self.bbox
+        b[0], b[1], b[2], b[3] = min(b[0], x0), min(b[1], y0), max(b[2], x1), max(b[3], y1)
+
+    def _add_path(self, cmds, stroke, fill, lw=1.0, dash=None, extent=None):
+        if extent is None:
+            xs = [c[i] for c in cmds for i in range(1, len(c), 2)]
+            ys = [c[i] for c in cmds for i in range(2, len(c), 2)]
+            extent = (min(xs), min(ys), max(xs), max(ys))
+        pad = 0.5 * lw if stroke else 0.0
+        self._grow(extent[0] - pad, extent[1] - pad, extent[2] + pad, extent[3] + pad)
+        self.items.append(("path", cmds, stroke, fill, lw, dash))
+
+    def _add_text(self, label, x, y, ha="center", va="center"):
+        if not label:
+            return
+        glyph = _label_glyphs(label, self.family, self.size)
+        cmds, w, h, d = glyph
+        x0 = x - {"left": 0.0, "center": 0.5 * w, "right": w}[ha]
+        y0 = {"bottom": y + d, "center": y - 0.5 * h + d, "top": y - h + d}[va]
+        self._grow(x0, y0 - d, x0 + w, y0 - d + h)
+        gid = self.glyph_ids.get(label)
+        if gid is None:
+            # the scene carries its own outlines so it can be pickled from a worker and written anywhere
+            gid = self.glyph_ids[label] = len(self.glyphs)
+            self.glyphs.append(glyph)
+        self.items.append(("text", gid, x0, y0, self.text_rgb))
+
+    def _add_plate(self, p):
+        x, y, w, h = [v * self.k for v in p['rect']]
+        self._add_path(_rect_cmds(x, y, w, h), (0, 0, 0), (1, 1, 1))
+        position = p.get('position', 'bottom right')
+        off = 5.0
+        if "left" in position:
+            tx, ha = x + off, "left"
+        elif "right" in position:
+            tx, ha = x + w - off, "right"
+        else:
+            tx, ha = x + 0.5 * w, "center"
+        if "top" in position:
+            ty, va = y + h - off - 0.1, "top"
+        else:
+            ty, va = y + off, "bottom"
+        self._add_text(p.get('label'), tx, ty, ha, va)
+
+    def _add_node(self, n):
+        fill = n.get('fill', 'white')
+        if n['observed'] and fill == 'white': fill = "0.95"
+        cx, cy = n['x'] * self.k, n['y'] * self.k
+        rx = 0.5 * n['scale'] * n.get('aspect', 1.0) * self.k
+        ry = 0.5 * n['scale'] * self.k
+        if n.get('shape', 'circle') == 'rectangle':
+            cmds = _rect_cmds(cx - rx, cy - ry, 2 * rx, 2 * ry)
+        else:
+            cmds = _ellipse_cmds(cx, cy, rx, ry)
+        self._add_path(cmds, (0, 0, 0), _rgb(fill), float(n['linewidth']),
+                       extent=(cx - rx, cy - ry, cx + rx, cy + ry))
+        self._add_text(n['label'], cx, cy)
+
+    def _add_arrow(self, start, ctrl, end, rgb, dash, head_l, head_w, double):
+        """ Stroke start->end (quadratic through ctrl, or straight if None) and fill its head wedge(s) """
+        def wedge(tip, frm):
+            dx, dy = tip[0] - frm[0], tip[1] - frm[1]
+            d = math.hypot(dx, dy) or 1.0
+            ux, uy = dx / d, dy / d
+            bx, by = tip[0] - head_l * ux, tip[1] - head_l * uy
+            self._add_path([("M", tip[0], tip[1]), ("L", bx - head_w * uy, by + head_w * ux),
+                            ("L", bx + head_w * uy, by - head_w * ux), ("Z",)], None, rgb)
+            return bx, by
+
+        frm_end = ctrl if ctrl is not None else start
+        frm_start = ctrl if ctrl is not None else end
+        line_end = wedge(end, frm_end)
+        line_start = wedge(start, frm_start) if double else start
+        if ctrl is None:
+            cmds = [("M",) + tuple(line_start), ("L",) + tuple(line_end)]
+            extent = None
+        else:
+            cmds = [("M",) + tuple(line_start), ("Q", ctrl[0], ctrl[1]) + tuple(line_end)]
+            lo, hi = _quad_extent(line_start, ctrl, line_end)
+            extent = (lo[0], lo[1], hi[0], hi[1])
+        self._add_path(cmds, rgb, None, 1.0, dash, extent)
+
+    def _add_edge(self, e, lookup):
+        node_a, node_b = lookup.get(e['source']), lookup.get(e['target'])
+        if not node_a or not node_b: return
+        k = self.k
+        rgb = _rgb(e.get('color') or 'black')
+        dash = _DASHES.get(EDGE_STYLES.get(e['style'], "-"))
+        hw, hl = e.get('head_width', 0.45), e.get('head_length', 0.45)
+        ax, ay, bx, by = node_a['x'] * k, node_a['y'] * k, node_b['x'] * k, node_b['y'] * k
+        rad = e.get('rad', 0.0)
+
+        def arc3(p0, p2, f):
+            mx, my = 0.5 * (p0[0] + p2[0]), 0.5 * (p0[1] + p2[1])
+            return mx + f * (p2[1] - p0[1]), my - f * (p2[0] - p0[0])
+
+        if e['source'] == e['target']:
+            # mirrors draw_manual_edge: annotate arrow between two points on the node rim
+            r = 0.4 * node_a['scale'] * k
+            r_start, r_end = r + e.get('gap_start', 0.1) * k, r + e.get('gap_end', 0.1) * k
+            f = -2.5 if rad == 0.0 else -abs(rad)
+            start = (ax + r_start * math.cos(math.radians(120)), ay + r_start * math.sin(math.radians(120)))
+            end = (ax + r_end * math.cos(math.radians(60)), ay + r_end * math.sin(math.radians(60)))
+            self._add_arrow(start, arc3(start, end, f), end, rgb, dash,
+                            hl * self.size, hw * self.size, e.get('double_head'))
+        elif rad != 0.0:
+            # daft edge: rim to rim, head sizes in model units
+            d = math.hypot(bx - ax, by - ay) or 1.0
+            ux, uy = (bx - ax) / d, (by - ay) / d
+            ra, rb = _node_frontier(node_a, ux, uy, k), _node_frontier(node_b, ux, uy, k)
+            start, end = (ax + ra * ux, ay + ra * uy), (bx - rb * ux, by - rb * uy)
+            self._add_arrow(start, arc3(start, end, rad), end, rgb, dash, hl * k, 0.5 * hw * k, False)
+        else:
+            d = math.hypot(bx - ax, by - ay) or 1.0
+            ux, uy = (bx - ax) / d, (by - ay) / d
+            r_a = (0.4 * node_a['scale'] + e.get('gap_start', 0.1)) * k
+            r_b = (0.4 * node_b['scale'] + e.get('gap_end', 0.1)) * k
+            start, end = (ax + r_a * ux, ay + r_a * uy), (bx - r_b * ux, by - r_b * uy)
+            self._add_arrow(start, None, end, rgb, dash, hl * self.size, hw * self.size, e.get('double_head'))
+
+
+def _num(v):
+    text = f"{v:.3f}".rstrip("0").rstrip(".")
+    return "0" if text in ("-0", "") else text
+
+
+def _svg_color(rgb):
+    return "none" if rgb is None else mcolors.to_hex(rgb)
+
+
+def _svg_d(cmds, x0, y1):
+    """ Path data in SVG user space (origin top-left): x' = x - x0, y' = y1 - y """
+    out = []
+    for c in cmds:
+        pts = [_num(c[i] - x0) if i % 2 else _num(y1 - c[i]) for i in range(1, len(c))]
+        out.append(c[0] + " ".join(pts))
+    return "".join(out)
+
+
+def _write_svg_page(placements, width, height, f):
+    """ placements: (scene, dx, dy) triples; scene point (x, y) lands at (x + dx, y + dy) on a y-up page """
+    f.write('<?xml version="1.0" encoding="utf-8" standalone="no"?>\n'
+            f'<svg xmlns="http://www.w3.org/2000/svg" xmlns:xlink="http://www.w3.org/1999/xlink" '
+            f'width="{_num(width)}pt" height="{_num(height)}pt" viewBox="0 0 {_num(width)} {_num(height)}" '
+            f'version="1.1">\n<rect width="100%" height="100%" fill="#ffffff"/>\n')
+    for si, (scene, dx, dy) in enumerate(placements):
+        x0, y1 = -dx, height - dy
+        emitted = set()
+        for item in scene.items:
+            if item[0] == "path":
+                _, cmds, stroke, fill, lw, dash = item
+                attrs = f'fill="{_svg_color(fill)}" stroke="{_svg_color(stroke)}"'
+                if stroke is not None:
+                    attrs += f' stroke-width="{_num(lw)}" stroke-linejoin="miter"'
+                    if dash:
+                        attrs += f' stroke-dasharray="{",".join(_num(v * lw) for v in dash)}"'
+                f.write(f'<path d="{_svg_d(cmds, x0, y1)}" {attrs}/>\n')
+            else:
+                _, gid, tx, ty, rgb = item
+                if gid not in emitted:
+                    # glyph outline is stored once with its baseline at the origin
+                    f.write(f'<defs><path id="g{si}_{gid}" d="{_svg_d(scene.glyphs[gid][0], 0.0, 0.0)}"/></defs>\n')
+                    emitted.add(gid)
+                f.write(f'<use xlink:href="#g{si}_{gid}" x="{_num(tx - x0)}" y="{_num(y1 - ty)}" '
+                        f'fill="{_svg_color(rgb)}"/>\n')
+    f.write('</svg>\n')
+
+
+def write_svg(project, f):
+    """ Stream a project as SVG text into the file-like object f """
+    scene = _VectorScene(project)
+    x0, y0, x1, y1 = scene.bbox
+    _write_svg_page([(scene, -x0, -y0)], x1 - x0, y1 - y0, f)
+
+
+def _pdf_ops(cmds, dx=0.0, dy=0.0):
+    """ PDF path operators; quadratic segments are raised to cubics """
+    out, cur = [], (0.0, 0.0)
+    for c in cmds:
+        if c[0] == "M":
+            cur = (c[1] + dx, c[2] + dy)
+            out.append(f"{_num(cur[0])} {_num(cur[1])} m")
+        elif c[0] == "L":
+            cur = (c[1] + dx, c[2] + dy)
+            out.append(f"{_num(cur[0])} {_num(cur[1])} l")
+        elif c[0] == "Q":
+            qx, qy, ex, ey = c[1] + dx, c[2] + dy, c[3] + dx, c[4] + dy
+            c1 = (cur[0] + 2 / 3 * (qx - cur[0]), cur[1] + 2 / 3 * (qy - cur[1]))
+            c2 = (ex + 2 / 3 * (qx - ex), ey + 2 / 3 * (qy - ey))
+            cur = (ex, ey)
+            out.append(" ".join(_num(v) for v in (*c1, *c2, ex, ey)) + " c")
+        elif c[0] == "C":
+            pts = [c[i] + (dx if i % 2 else dy) for i in range(1, 7)]
+            cur = (pts[4], pts[5])
+            out.append(" ".join(_num(v) for v in pts) + " c")
+        else:
+            out.append("h")
+    return "\n".join(out)
+
+
+def _write_pdf_page(placements, width, height, f):
+    """ Single-page PDF from (scene, dx, dy) placements, streamed into the binary file-like object f """
+    forms = [(si, gid) for si, (scene, _, _) in enumerate(placements) for gid in range(len(scene.glyphs))]
+    form_num = {key: 6 + k for k, key in enumerate(forms)}
+    # 1 catalog, 2 pages, 3 page, 4 content stream, 5 its length, 6.. one form XObject per label
+    offsets = {}
+    pos = [0]
+
+    def out(data):
+        if isinstance(data, str):
+            data = data.encode("latin-1")
+        f.write(data)
+        pos[0] += len(data)
+
+    def obj(num, body):
+        offsets[num] = pos[0]
+        out(f"{num} 0 obj\n{body}\nendobj\n")
+
+    out(b"%PDF-1.4\n%\xe2\xe3\xcf\xd3\n")
+    obj(1, "<< /Type /Catalog /Pages 2 0 R >>")
+    obj(2, "<< /Type /Pages /Kids [3 0 R] /Count 1 >>")
+    xobjects = " ".join(f"/G{si}_{gid} {num} 0 R" for (si, gid), num in form_num.items())
+    obj(3, f"<< /Type /Page /Parent 2 0 R /MediaBox [0 0 {_num(width)} {_num(height)}] "
+           f"/Resources << /XObject << {xobjects} >> >> /Contents 4 0 R >>")
+
+    offsets[4] = pos[0]
+    out("4 0 obj\n<< /Length 5 0 R /Filter /FlateDecode >>\nstream\n")
+    start = pos[0]
+    z = zlib.compressobj()
+    out(z.compress(f"1 1 1 rg 0 0 {_num(width)} {_num(height)} re f\n".encode("latin-1")))
+    for si, (scene, dx, dy) in enumerate(placements):
+        for item in scene.items:
+            if item[0] == "path":
+                _, cmds, stroke, fill, lw, dash = item
+                ops = ["q"]
+                if fill is not None:
+                    ops.append("{} {} {} rg".format(*(_num(v) for v in fill)))
+                if stroke is not None:
+                    ops.append("{} {} {} RG {} w".format(*(_num(v) for v in stroke), _num(lw)))
+                    ops.append(f"[{' '.join(_num(v * lw) for v in dash)}] 0 d" if dash else "[] 0 d")
+                ops.append(_pdf_ops(cmds, dx, dy))
+                ops.append("B" if fill is not None and stroke is not None else ("f" if fill is not None else "S"))
+                ops.append("Q\n")
+            else:
+                _, gid, tx, ty, rgb = item
+                ops = ["q", "{} {} {} rg".format(*(_num(v) for v in rgb)),
+                       f"1 0 0 1 {_num(tx + dx)} {_num(ty + dy)} cm /G{si}_{gid} Do", "Q\n"]
+            out(z.compress("\n".join(ops).encode("latin-1")))
+    out(z.flush())
+    length = pos[0] - start
+    out("\nendstream\nendobj\n")
+    obj(5, str(length))
+
+    for (si, gid), num in form_num.items():
+        cmds, w, h, d = placements[si][0].glyphs[gid]
+        data = zlib.compress((_pdf_ops(cmds) + "\nf").encode("latin-1"))
+        offsets[num] = pos[0]
+        out(f"{num} 0 obj\n<< /Type /XObject /Subtype /Form /BBox [{_num(-1)} {_num(-d - 1)} "
+            f"{_num(w + 1)} {_num(h - d + 1)}] /Length {len(data)} /Filter /FlateDecode >>\nstream\n")
+        out(data)
+        out("\nendstream\nendobj\n")
+
+    count = 6 + len(forms)
+    xref = pos[0]
+    out(f"xref\n0 {count}\n0000000000 65535 f \n")
+    for num in range(1, count):
+        out(f"{offsets[num]:010d} 00000 n \n")
+    out(f"trailer\n<< /Size {count} /Root 1 0 R >>\nstartxref\n{xref}\n%%EOF\n")
+
+
+def write_pdf(project, f):
+    """ Stream a project as a single-page PDF into the binary file-like object f """
+    scene = _VectorScene(project)
+    x0, y0, x1, y1 = scene.bbox
+    _write_pdf_page([(scene, -x0, -y0)], x1 - x0, y1 - y0, f)
+
+
+def export_vector(project, path):
+    """ Write path as SVG or PDF (chosen by extension) through the native vector writer """
+    if path.lower().endswith(".svg"):
+        with open(path, "w", encoding="utf-8") as f:
+            write_svg(project, f)
+    elif path.lower().endswith(".pdf"):
+        with open(path, "wb") as f:
+            write_pdf(project, f)
+    else:
+        raise ValueError(f"Native vector export supports .svg and .pdf, not {os.path.splitext(path)[1]!r}")
+
+
+# -----------------------------------------------------------------------------
+# TILED RASTER EXPORT
+# High-DPI PNG/TIFF files are rendered as horizontal strips of the figure and
+# each strip is encoded as soon as it is drawn, so peak memory is one strip of
+# RGBA pixels (width x STRIP_PX x 4 bytes) however large the output image is.
+# -----------------------------------------------------------------------------
+STRIP_PX = 512
+TILED_FORMATS = ("png", "tif", "tiff")
+
+
+def _figure_strips(fig, dpi, bbox_inches="tight", strip_px=STRIP_PX):
+    """ (width, height, iterator of uint8 RGBA row blocks, top to bottom) for fig cropped to bbox_inches """
+    if bbox_inches == "tight":
+        # text extents depend on dpi, so measure at the output resolution as savefig does, but with a
+        # 1x1 renderer: only text metrics are needed, not a full-size canvas
+        screen_dpi = fig.dpi
+        fig.dpi = dpi
+        try:
+            bbox = fig.get_tightbbox(RendererAgg(1, 1, dpi)).padded(matplotlib.rcParams["savefig.pad_inches"])
+        finally:
+            fig.dpi = screen_dpi
+    elif bbox_inches is None:
+        bbox = Bbox.from_bounds(0, 0, *fig.get_size_inches())
+    else:
+        bbox = bbox_inches
+    # same truncation and bottom-left anchoring as a whole-figure savefig, so the pixels line up exactly
+    width = max(1, int(bbox.width * dpi))
+    height = max(1, int(bbox.height * dpi))
+
+    def strips():
+        for top in range(0, height, strip_px):
+            rows = min(strip_px, height - top)
+            # Agg truncates the canvas size, so the extra half pixel keeps it at exactly width x rows
+            y0 = bbox.y0 + (height - top - rows) / dpi
+            crop = Bbox.from_bounds(bbox.x0, y0, (width + 0.5) / dpi, (rows + 0.5) / dpi)
+            buf = io.BytesIO()
+            fig.savefig(buf, format="rgba", dpi=dpi, bbox_inches=crop)
+            yield np.frombuffer(buf.getbuffer(), np.uint8).reshape(rows, width, 4)
+
+    return width, height, strips()
+
+
+def _png_chunk(f, tag, data):
+    f.write(struct.pack(">I", len(data)) + tag + data + struct.pack(">I", zlib.crc32(tag + data)))
+
+
+def _write_png_strips(f, width, height, strips, dpi):
+    f.write(b"\x89PNG\r\n\x1a\n")
+    _png_chunk(f, b"IHDR", struct.pack(">IIBBBBB", width, height, 8, 6, 0, 0, 0))
+    ppm = int(round(dpi / 0.0254))
+    _png_chunk(f, b"pHYs", struct.pack(">IIB", ppm, ppm, 1))
+    z = zlib.compressobj(6)
+    prev = np.zeros(width * 4, np.uint8)
+    pending = []
+    for block in strips:
+        rows = block.reshape(len(block), width * 4)
+        # "Up" filter: each row minus the row above, which collapses the flat areas of a diagram
+        filtered = np.empty((len(rows), width * 4 + 1), np.uint8)
+        filtered[:, 0] = 2
+        np.subtract(rows[0], prev, out=filtered[0, 1:])
+        np.subtract(rows[1:], rows[:-1], out=filtered[1:, 1:])
+        prev = rows[-1].copy()
+        pending.append(z.compress(filtered))
+        if sum(map(len, pending)) >= 1 << 16:
+            _png_chunk(f, b"IDAT", b"".join(pending))
+            pending = []
+    pending.append(z.flush())
+    _png_chunk(f, b"IDAT", b"".join(pending))
+    _png_chunk(f, b"IEND", b"")
+
+
+def _write_tiff_strips(f, width, height, strips, dpi, strip_px):
+    """ Baseline little-endian RGBA TIFF, one Deflate-compressed strip per rendered block; f must be seekable """
+    f.write(b"II*\x00\x00\x00\x00\x00")
+    offsets, counts = [], []
+    for block in strips:
+        data = zlib.compress(block, 6)
+        offsets.append(f.tell())
+        counts.append(len(data))
+        f.write(data)
+    if f.tell() % 2:
+        f.write(b"\x00")
+
+    n = len(offsets)
+    extra = b"".join(struct.pack("<H", 8) for _ in range(4))                 # BitsPerSample
+    extra += struct.pack(f"<{n}I", *offsets) + struct.pack(f"<{n}I", *counts)
+    extra += struct.pack("<II", int(round(dpi * 100)), 100) * 2              # X/YResolution
+    base = f.tell()
+    tags = [(256, 4, 1, width), (257, 4, 1, height), (258, 3, 4, base), (259, 3, 1, 8), (262, 3, 1, 2),
+            (273, 4, n, base + 8), (277, 3, 1, 4), (278, 4, 1, strip_px), (279, 4, n, base + 8 + 4 * n),
+            (282, 5, 1, base + 8 + 8 * n), (283, 5, 1, base + 16 + 8 * n), (284, 3, 1, 1), (296, 3, 1, 2),
+            (338, 3, 1, 2)]
+    ifd = base + len(extra)
+    if n == 1:
+        # single values live inside the IFD entry rather than at an offset
+        tags[5], tags[8] = (273, 4, 1, offsets[0]), (279, 4, 1, counts[0])
+    f.write(extra)
+    f.write(struct.pack("<H", len(tags)))
+    for tag, kind, count, value in tags:
+        packed = struct.pack("<HI", value, 0)[:4] if kind == 3 and count == 1 else struct.pack("<I", value)
+        f.write(struct.pack("<HHI", tag, kind, count) + packed)
+    f.write(struct.pack("<I", 0))
+    f.seek(4)
+    f.write(struct.pack("<I", ifd))
+
+
+def save_figure_tiled(fig, path, dpi=300, bbox_inches="tight", strip_px=STRIP_PX):
+    """ savefig for PNG/TIFF with memory bounded by strip_px rows; other formats go through savefig """
+    fmt = os.path.splitext(path)[1].lower().lstrip(".")
+    if fmt not in TILED_FORMATS:
+        fig.savefig(path, dpi=dpi, bbox_inches=bbox_inches)
+        return
+    width, height, strips = _figure_strips(fig, dpi, bbox_inches, strip_px)
+    with open(path, "wb") as f:
+        if fmt == "png":
+            _write_png_strips(f, width, height, strips, dpi)
+        else:
+            _write_tiff_strips(f, width, height, strips, dpi, strip_px)
+
+
+# -----------------------------------------------------------------------------
+# PLATE CONTAINMENT
+# A node belongs to every plate whose rect holds its centre; a plate is nested
+# in every plate whose rect holds all of it. Plates and node centres are
+# bucketed on a uniform grid so membership queries only look at nearby items.
+# -----------------------------------------------------------------------------
+def _rect_contains_point(rect, x, y):
+    return rect[0] <= x <= rect[0] + rect[2] and rect[1] <= y <= rect[1] + rect[3]
+
+
+def _rect_contains_rect(outer, inner):
+    return (outer[0] <= inner[0] and outer[1] <= inner[1] and
+            inner[0] + inner[2] <= outer[0] + outer[2] and inner[1] + inner[3] <= outer[1] + outer[3])
+
+
+class ContainmentIndex:
+    """ Grid index over node centres and plate rects, with the plate nesting tree derived from it.
+    The cell size follows the data extents (about sqrt(n) cells a side), so it suits in, cm and px canvases
+    alike, and sync() re-buckets only the elements that moved instead of rebuilding. """
+
+    def __init__(self, nodes, plates, cell=None):
+        self.cell = cell or self._auto_cell(nodes, plates)
+        self.sized_for = len(nodes) + len(plates)
+        self._node_keys = []
+        self._plate_rects = []
+        self._node_cells = {}
+        self._plate_cells = {}
+        self.sync(nodes, plates)
+
+    @staticmethod
+    def _auto_cell(nodes, plates):
+        xs = [n['x'] for n in nodes] + [p['rect'][0] + dx for p in plates for dx in (0.0, p['rect'][2])]
+        ys = [n['y'] for n in nodes] + [p['rect'][1] + dy for p in plates for dy in (0.0, p['rect'][3])]
+        extent = max(max(xs) - min(xs), max(ys) - min(ys)) if xs else 0.0
+        return extent / math.ceil(math.sqrt(len(xs) + 1)) if extent > 0 else 1.0
+
+    def suits(self, count):
+        """ False once the element count has drifted far enough from the build that the cell size is off """
+        return self.sized_for // 4 <= count <= 4 * max(self.sized_for, 16)
+
+    def sync(self, nodes, plates):
+        """ Bring the index up to date with the (edited, undone, reloaded) element lists """
+        self.nodes, self.plates = nodes, plates
+        keys = self._node_keys
+        for i, n in enumerate(nodes):
+            key = self._key(n['x'], n['y'])
+            if i < len(keys):
+                if keys[i] == key:
+                    continue
+                self._unbucket(self._node_cells, keys[i], i)
+                keys[i] = key
+            else:
+                keys.append(key)
+            self._node_cells.setdefault(key, set()).add(i)
+        for i in range(len(nodes), len(keys)):
+            self._unbucket(self._node_cells, keys[i], i)
+        del keys[len(nodes):]
+
+        rects = self._plate_rects
+        changed = len(rects) != len(plates)
+        for j, p in enumerate(plates):
+            rect = tuple(p['rect'])
+            if j < len(rects):
+                if rects[j] == rect:
+                    continue
+                for key in self._cells(rects[j], clamp=False):
+                    self._unbucket(self._plate_cells, key, j)
+                rects[j] = rect
+            else:
+                rects.append(rect)
+            changed = True
+            for key in self._cells(rect, clamp=False):
+                self._plate_cells.setdefault(key, set()).add(j)
+        for j in range(len(plates), len(rects)):
+            for key in self._cells(rects[j], clamp=False):
+                self._unbucket(self._plate_cells, key, j)
+        del rects[len(plates):]
+        if changed:
+            self._parents = None
+        occupied = list(self._node_cells) + list(self._plate_cells)
+        self._bounds = (min(k[0] for k in occupied), min(k[1] for k in occupied),
+                        max(k[0] for k in occupied), max(k[1] for k in occupied)) if occupied else (0, 0, -1, -1)
+        return self
+
+    @staticmethod
+    def _unbucket(cells, key, i):
+        bucket = cells[key]
+        bucket.discard(i)
+        if not bucket:
+            del cells[key]
+
+    def _key(self, x, y):
+        return int(math.floor(x / self.cell)), int(math.floor(y / self.cell))
+
+    def _cells(self, rect, clamp=True):
+        (cx0, cy0), (cx1, cy1) = self._key(rect[0], rect[1]), self._key(rect[0] + rect[2], rect[1] + rect[3])
+        if clamp:
+            # a rubber band far bigger than the diagram only needs the occupied cells
+            bx0, by0, bx1, by1 = self._bounds
+            cx0, cy0, cx1, cy1 = max(cx0, bx0), max(cy0, by0), min(cx1, bx1), min(cy1, by1)
+        return [(cx, cy) for cx in range(cx0, cx1 + 1) for cy in range(cy0, cy1 + 1)]
+
+    def nodes_in_rect(self, rect):
+        found = []
+        for key in self._cells(rect):
+            found.extend(i for i in self._node_cells.get(key, ())
+                         if _rect_contains_point(rect, self.nodes[i]['x'], self.nodes[i]['y']))
+        return sorted(found)
+
+    def plates_in_rect(self, rect, exclude=None):
+        candidates = set()
+        for key in self._cells(rect):
+            candidates.update(self._plate_cells.get(key, ()))
+        candidates.discard(exclude)
+        return sorted(j for j in candidates if _rect_contains_rect(rect, self.plates[j]['rect']))
+
+    def plates_at(self, x, y):
+        """ Plates containing (x, y), innermost first """
+        hits = [j for j in self._plate_cells.get(self._key(x, y), ())
+                if _rect_contains_point(self.plates[j]['rect'], x, y)]
+        return sorted(hits, key=lambda j: self.plates[j]['rect'][2] * self.plates[j]['rect'][3])
+
+    def parent(self, plate_index):
+        """ Smallest plate that encloses the given plate, or None at the top level """
+        if self._parents is None:
+            self._parents = {}
+            for j, p in enumerate(self.plates):
+                for k in self.plates_in_rect(p['rect'], exclude=j):
+                    current = self._parents.get(k)
+                    if current is None or _rect_area(p['rect']) < _rect_area(self.plates[current]['rect']):
+                        self._parents[k] = j
+        return self._parents.get(plate_index)
+
+    def children(self, plate_index):
+        return [j for j in range(len(self.plates)) if self.parent(j) == plate_index]
+
+    def contents(self, plate_index):
+        """ (node indices, nested plate indices) for everything inside a plate, at any depth """
+        rect = self.plates[plate_index]['rect']
+        return self.nodes_in_rect(rect), self.plates_in_rect(rect, exclude=plate_index)
+
+
+def _rect_area(rect):
+    return rect[2] * rect[3]
+
+
+def _unique_name(base, taken):
+    i = 2
+    while f"{base}_{i}" in taken:
+        i += 1
+    taken.add(f"{base}_{i}")
+    return f"{base}_{i}"
+
+
+# -----------------------------------------------------------------------------
+# BULK IMPORT
+# Model formulas and CSV/TSV element tables are turned into plain node/edge/
+# plate dicts, validated as one batch and committed as a single undo step.
+# -----------------------------------------------------------------------------
+NODE_DEFAULTS = {'label': "", 'scale': 1.0, 'linewidth': 1.0, 'observed': False, 'fill': "white",
+                 'shape': "circle", 'aspect': 1.0}
+EDGE_DEFAULTS = {'style': "Solid", 'head_width': 0.45, 'head_length': 0.45, 'rad': 0.0, 'gap_start': 0.1,
+                 'gap_end': 0.1, 'double_head': False, 'color': "black"}
+_FLOAT_KEYS = {"x", "y", "scale", "linewidth", "aspect", "head_width", "head_length", "rad", "gap_start", "gap_end"}
+_BOOL_KEYS = {"observed", "double_head"}
+_RANDOM_TERM = re.compile(r"\(([^()|]*)(\|\|?)([^()|]+)\)")
+
+
+def _term_label(term):
+    """ x1 -> $x_{1}$, beta -> $beta$; anything else (log(x), a:b) stays plain text """
+    m = re.fullmatch(r"([A-Za-z]+)_?(\d+)", term)
+    if m:
+        return f"${m.group(1)}_{{{m.group(2)}}}$"
+    if re.fullmatch(r"[A-Za-z]+", term):
+        return f"${term}$"
+    return term.replace(":", " x ")
+
+
+def _split_top_level(text, sep):
+    """ Split on sep outside parentheses, so log(x + 1) stays one term; a '-' is kept with the term after it """
+    parts, depth, start = [], 0, 0
+    for i, ch in enumerate(text):
+        if ch == "(":
+            depth += 1
+        elif ch == ")":
+            depth -= 1
+            if depth < 0:
+                raise ValueError(f"Unbalanced ')' in '{text.strip()}'")
+        elif depth == 0 and ch in sep:
+            parts.append(text[start:i])
+            start = i if ch == "-" else i + 1
+    if depth:
+        raise ValueError(f"Unbalanced '(' in '{text.strip()}'")
+    parts.append(text[start:])
+    return parts
+
+
+def _split_terms(text):
+    """ Fixed-effect terms of a formula side; returns (terms, has_intercept) """
+    terms, intercept = [], True
+    for raw in _split_top_level(text, "+-"):
+        term = raw.strip()
+        if not term:
+            continue
+        if term in ("0", "-1", "- 1"):
+            intercept = False
+        elif term == "1":
+            intercept = True
+        elif term.startswith("-"):
+            raise ValueError(f"Term removal is not supported: '{term}'")
+        elif len(_split_top_level(term, "*")) > 1:
+            parts = [t.strip() for t in _split_top_level(term, "*")]
+            for t in parts + [":".join(parts)]:
+                if t not in terms:
+                    terms.append(t)
+        elif term not in terms:
+            terms.append(term)
+    return terms, intercept
+
+
+def parse_formula(formula):
+    """ Parse an R/patsy/lme4 style formula: 'y ~ x1 + x2*x3 + (1 + x1 | group)' """
+    if formula.count("~") != 1:
+        raise ValueError("A formula needs exactly one '~', e.g. y ~ x1 + x2")
+    lhs, rhs = [side.strip() for side in formula.split("~")]
+    if not lhs:
+        raise ValueError("The formula has no response (left of '~')")
+    random = []
+    for inner, bar, group in _RANDOM_TERM.findall(rhs):
+        terms, intercept = _split_terms(inner)
+        # lme4's (terms || group) gives each effect its own variance instead of one covariance matrix
+        random.append({'group': group.strip(), 'terms': terms, 'intercept': intercept, 'correlated': bar == "|"})
+    rest = _RANDOM_TERM.sub("", rhs)
+    if "|" in rest:
+        raise ValueError("Could not parse a random-effect term; write it as (terms | group) or (terms || group)")
+    fixed, intercept = _split_terms(rest)
+    return {'response': lhs, 'fixed': fixed, 'intercept': intercept, 'random': random}
+
+
+def formula_to_elements(formula, spacing=1.5):
+    """ Lay out a GLM diagram for a formula: predictors and the coefficient vector feed eta, eta feeds
+    the response; each (terms | group) block becomes a plate of random effects with its own sigma,
+    and a (terms || group) block gets one sigma per effect. """
+    model = parse_formula(formula)
+    nodes, edges, plates = [], [], []
+
+    def node(name, label, x, y, observed=False):
+        nodes.append(dict(NODE_DEFAULTS, name=name, label=label, x=x, y=y, observed=observed))
+
+    def edge(source, target):
+        edges.append(dict(EDGE_DEFAULTS, source=source, target=target))
+
+    k = len(model['fixed'])
+    xs = [2.5 + spacing * i for i in range(k)]
+    cx = sum(xs) / k if k else 2.5
+    node("eta", r"$\eta$", cx, 3.5)
+    node(model['response'], _term_label(model['response']), cx, 2.0, observed=True)
+    edge("eta", model['response'])
+    for term, x in zip(model['fixed'], xs):
+        node(term, _term_label(term), x, 5.0, observed=True)
+        edge(term, "eta")
+    if k or model['intercept']:
+        # coefficients (and intercept) as one vector node beside the data plate
+        node("beta", r"$\beta$", 1.0, 3.5)
+        edge("beta", "eta")
+    right = max(xs[-1] if xs else cx, cx) + 0.7
+    plates.append({'rect': [1.8, 1.3, right - 1.8, 4.4], 'label': r"$i = 1, \ldots, N$",
+                   'position': "bottom right"})
+
+    effects = []
+    for block in model['random']:
+        group = block['group']
+        names = [(f"u_{group}", f"$u_{{{group}}}$", "u")] if block['intercept'] else []
+        names += [(f"b_{t}_{group}", f"$b_{{{t}}}$", t) for t in block['terms']]
+        if names:
+            effects.append((group, names, block['correlated']))
+    total = sum(len(names) for _, names, _ in effects)
+    col = right + 1.2
+    y = 3.5 + spacing * (total - 1) / 2
+    for group, names, correlated in effects:
+        top = y
+        for name, label, term in names:
+            node(name, label, col, y)
+            edge(name, "eta")
+            if not correlated:
+                node(f"sigma_{name}", rf"$\sigma_{{{term},{group}}}$", col + spacing + 0.5, y)
+                edge(f"sigma_{name}", name)
+            y -= spacing
+        bottom = y + spacing
+        if correlated:
+            sigma = f"sigma_{group}"
+            node(sigma, rf"$\sigma_{{{group}}}$", col + spacing + 0.5, (top + bottom) / 2)
+            for name, _, _ in names:
+                edge(sigma, name)
+        plates.append({'rect': [col - 0.7, bottom - 0.7, 1.4, top - bottom + 1.4], 'label': group,
+                       'position': "bottom right"})
+
+    # tall random-effect stacks can run below the origin; lift everything back onto the canvas
+    lift = max(0.0, 0.5 - min(p['rect'][1] for p in plates))
+    for n in nodes:
+        n['y'] += lift
+    for p in plates:
+        p['rect'][1] += lift
+    return nodes, edges, plates
+
+
+def _coerce_field(key, text):
+    if key in _FLOAT_KEYS:
+        return float(text)
+    if key in _BOOL_KEYS:
+        return text.strip().lower() in ("1", "true", "yes", "y")
+    return text
+
+
+def read_element_table(path):
+    """ Stream a CSV/TSV node table (name, x, y, ...) or edge table (source, target, ...) row by row.
+    Returns (nodes, edges, errors); the table kind is taken from its header. """
+    delimiter = "\t" if path.lower().endswith((".tsv", ".tab")) else ","
+    nodes, edges, errors = [], [], []
+    base = os.path.basename(path)
+    with open(path, "r", newline="") as f:
+        reader = csv.reader(f, delimiter=delimiter)
+        header = [h.strip().lower() for h in next(reader, [])]
+        if {"source", "target"} <= set(header):
+            defaults, out = EDGE_DEFAULTS, edges
+        elif {"name", "x", "y"} <= set(header):
+            defaults, out = NODE_DEFAULTS, nodes
+        else:
+            return nodes, edges, [f"{base}: header needs name,x,y (nodes) or source,target (edges)"]
+        for line, row in enumerate(reader, start=2):
+            if not row or not any(cell.strip() for cell in row):
+                continue
+            element = dict(defaults)
+            try:
+                for key, cell in zip(header, row):
+                    if cell.strip() != "":
+                        element[key] = _coerce_field(key, cell.strip())
+            except ValueError as e:
+                errors.append(f"{base} line {line}: {e}")
+                continue
+            out.append(element)
+    return nodes, edges, errors
+
+
+def _is_finite_number(value):
+    # float() happily accepts 'inf' and 'nan', and JSON bools are ints
+    return isinstance(value, (int, float)) and not isinstance(value, bool) and math.isfinite(value)
+
+
+def _check_numbers(what, element, keys=_FLOAT_KEYS):
+    """ Numeric fields must be real, finite numbers """
+    errors = []
+    for key in keys & element.keys():
+        value = element[key]
+        if not _is_finite_number(value):
+            errors.append(f"{what}: {key} must be a finite number, not {value!r}")
+    return errors
+
+
+def validate_import(existing_nodes, nodes, edges, node_shapes=("circle", "rectangle")):
+    """ Batch checks before anything is committed; returns a list of error messages """
+    errors = []
+    names = {n['name'] for n in existing_nodes}
+    for n in nodes:
+        if not n.get('name'):
+            errors.append("Node without a name")
+        elif n['name'] in names:
+            errors.append(f"Duplicate node name '{n['name']}'")
+        names.add(n.get('name'))
+        if n.get('shape') not in node_shapes:
+            errors.append(f"Node '{n.get('name')}': unknown shape '{n.get('shape')}'")
+        if 'x' not in n or 'y' not in n:
+            errors.append(f"Node '{n.get('name')}': missing x / y")
+        errors += _check_numbers(f"Node '{n.get('name')}'", n)
+        if not isinstance(n.get('label', ""), str):
+            errors.append(f"Node '{n.get('name')}': label must be a string")
+        if not mcolors.is_color_like(n.get('fill', "white")):
+            errors.append(f"Node '{n.get('name')}': unknown fill colour '{n.get('fill')}'")
+    for e in edges:
+        for end in ('source', 'target'):
+            if e.get(end) not in names:
+                errors.append(f"Edge {e.get('source')} -> {e.get('target')}: unknown {end} node")
+        style = str(e.get('style', "Solid"))
+        match = next((key for key in EDGE_STYLES if key.lower() == style.lower()), None)
+        if match is None:
+            errors.append(f"Edge {e.get('source')} -> {e.get('target')}: unknown style '{style}'")
+        else:
+            e['style'] = match
+        errors += _check_numbers(f"Edge {e.get('source')} -> {e.get('target')}", e)
+        if not mcolors.is_color_like(e.get('color', "black")):
+            errors.append(f"Edge {e.get('source')} -> {e.get('target')}: unknown colour '{e.get('color')}'")
+    return errors
+
+
+# -----------------------------------------------------------------------------
+# SELECTION TRANSFORMS
+# Whole-selection edits as array operations on an (n, 2) array of node centres;
+# half_sizes holds each node's half width/height for edge-based alignment.
+# -----------------------------------------------------------------------------
+def align_positions(xy, half_sizes, mode):
+    """ mode: left, center, right (x) or top, middle, bottom (y) """
+    xy = np.array(xy, dtype=float)
+    axis = 0 if mode in ("left", "center", "right") else 1
+    lo = xy[:, axis] - half_sizes[:, axis]
+    hi = xy[:, axis] + half_sizes[:, axis]
+    if mode in ("left", "bottom"):
+        xy[:, axis] = lo.min() + half_sizes[:, axis]
+    elif mode in ("right", "top"):
+        xy[:, axis] = hi.max() - half_sizes[:, axis]
+    else:
+        xy[:, axis] = 0.5 * (lo.min() + hi.max())
+    return xy
+
+
+def distribute_positions(xy, axis):
+    """ Even spacing of centres along one axis, keeping the two outermost nodes where they are """
+    xy = np.array(xy, dtype=float)
+    order = np.argsort(xy[:, axis], kind="stable")
+    xy[order, axis] = np.linspace(xy[order[0], axis], xy[order[-1], axis], len(xy))
+    return xy
+
+
+def transform_positions(xy, offset=(0.0, 0.0), scale=1.0, angle_deg=0.0, origin=None):
+    """ Scale and rotate about origin (default: the centroid), then translate """
+    xy = np.array(xy, dtype=float)
+    origin = xy.mean(axis=0) if origin is None else np.asarray(origin, dtype=float)
+    theta = math.radians(angle_deg)
+    rot = np.array([[math.cos(theta), -math.sin(theta)], [math.sin(theta), math.cos(theta)]])
+    return (xy - origin) @ (scale * rot).T + origin + np.asarray(offset, dtype=float)
+
+
+# -----------------------------------------------------------------------------
+# TEMPLATES & BATCH VARIANTS
+# A template is a project file with two extra keys: "parameters" (defaults)
+# and "repeat" (rules that stamp out elements once per index). Any string may
+# hold {{name}} placeholders; numeric fields may hold arithmetic on them,
+# e.g. "x": "1 + 1.5 * {{i}}".
+# -----------------------------------------------------------------------------
+_PLACEHOLDER = re.compile(r"\{\{\s*(\w+)\s*\}\}")
+
+TEMPLATE_NUMERIC_KEYS = {"x", "y", "scale", "linewidth", "aspect", "rad", "gap_start", "gap_end",
+                         "head_width", "head_length", "font_size", "canvas_width", "canvas_height"}
+
+_EXPR_FUNCS = {"min": min, "max": max, "abs": abs, "round": round, "int": int, "float": float}
+_EXPR_OPS = {ast.Add: lambda a, b: a + b, ast.Sub: lambda a, b: a - b, ast.Mult: lambda a, b: a * b,
+             ast.Div: lambda a, b: a / b, ast.FloorDiv: lambda a, b: a // b, ast.Mod: lambda a, b: a % b,
+             ast.Pow: lambda a, b: _bounded_pow(a, b), ast.USub: lambda a: -a, ast.UAdd: lambda a: +a}
+
+
+def _bounded_pow(a, b):
+    # templates are expanded on the Tk thread; 10**10**10 would never finish
+    if abs(b) > 64 or abs(a) > 1e100:
+        raise ValueError(f"Power {a!r} ** {b!r} is out of range in a template expression")
+    return a ** b
+
+
+def _eval_expr(text, params):
+    """ Evaluate a small arithmetic expression over template parameters (no builtins, no attributes) """
+    def _eval(node):
+        if isinstance(node, ast.Expression):
+            return _eval(node.body)
+        if isinstance(node, ast.Constant) and isinstance(node.value, (int, float)):
+            return node.value
+        if isinstance(node, ast.Name) and node.id in params:
+            value = params[node.id]
+            if isinstance(value, bool) or not isinstance(value, (int, float)):
+                raise ValueError(f"Template parameter '{node.id}' is used in arithmetic but is {value!r}")
+            return value
+        if isinstance(node, ast.BinOp) and type(node.op) in _EXPR_OPS:
+            return _EXPR_OPS[type(node.op)](_eval(node.left), _eval(node.right))
+        if isinstance(node, ast.UnaryOp) and type(node.op) in _EXPR_OPS:
+            return _EXPR_OPS[type(node.op)](_eval(node.operand))
+        if (isinstance(node, ast.Call) and isinstance(node.func, ast.Name) and node.func.id in _EXPR_FUNCS
+                and not node.keywords):
+            return _EXPR_FUNCS[node.func.id](*[_eval(a) for a in node.args])
+        raise ValueError(f"Unsupported template expression: {text!r}")
+    return _eval(ast.parse(text.strip(), mode="eval"))
+
+
+def _param(params, name):
+    if name not in params:
+        raise ValueError(f"Template parameter '{name}' is not defined")
+    return params[name]
+
+
+def _substitute(value, params):
+    if not isinstance(value, str):
+        return value
+    whole = _PLACEHOLDER.fullmatch(value.strip())
+    if whole:
+        # a lone placeholder keeps the parameter's own type (numbers, booleans)
+        return _param(params, whole.group(1))
+
+    def _lookup(match):
+        return str(_param(params, match.group(1)))
+    return _PLACEHOLDER.sub(_lookup, value)
+
+
+def _expand_value(key, value, params):
+    if isinstance(value, list):
+        return [_expand_value(key, v, params) for v in value]
+    value = _substitute(value, params)
+    if isinstance(value, str) and (key in TEMPLATE_NUMERIC_KEYS or key == "rect"):
+        value = _eval_expr(value, params)
+    return value
+
+
+def _expand_block(block, params, project):
+    for kind in ("nodes", "edges", "plates"):
+        for element in block.get(kind, []):
+            project[kind].append({k: _expand_value(k, v, params) for k, v in element.items()})
+    for rule in block.get("repeat", []):
+        var = rule.get("var", "i")
+        start = int(_expand_value("x", rule.get("start", 1), params))
+        count = int(_expand_value("x", rule.get("count", 0), params))
+        for index in range(start, start + count):
+            _expand_block(rule, {**params, var: index}, project)
+
+
+def expand_template(template, params=None):
+    """ Expand a template against one row of parameters into a concrete project dict """
+    merged = {**template.get("parameters", {}), **(params or {})}
+    project = {"nodes": [], "edges": [], "plates": []}
+    _expand_block(template, merged, project)
+    project["settings"] = {k: _expand_value(k, v, merged) for k, v in template.get("settings", {}).items()}
+    return project
+
+
+def _coerce_cell(text):
+    text = text.strip()
+    if text.lower() in ("true", "false"):
+        return text.lower() == "true"
+    for cast in (int, float):
+        try:
+            return cast(text)
+        except ValueError:
+            pass
+    return text
+
+
+def read_parameter_table(path):
+    """ Read a CSV/TSV parameter table; returns (variant_name, params) per row """
+    delimiter = "\t" if path.lower().endswith((".tsv", ".tab")) else ","
+    rows, taken = [], set()
+    with open(path, "r", newline="") as f:
+        for i, row in enumerate(csv.DictReader(f, delimiter=delimiter)):
+            params = {k.strip(): _coerce_cell(v) for k, v in row.items() if k and v is not None and v.strip()}
+            # the name becomes a file name: keep it to one plain path component, unique even on
+            # case-insensitive file systems, so no two rows write the same files
+            stem = re.sub(r"[^\w.-]+", "_", str(params.pop("variant", ""))).strip("._") or f"variant_{i + 1:03d}"
+            name, k = stem, 2
+            while name.lower() in taken:
+                name, k = f"{stem}_{k}", k + 1
+            taken.add(name.lower())
+            rows.append((name, params))
+    return rows
+
+
+def _init_render_worker():
+    """ Process-pool initializer: switch to a headless backend and warm the font/mathtext caches once """
+    plt.switch_backend("Agg")
+    fig = plt.figure(figsize=(1, 1))
+    for family in ("serif", "sans-serif", "monospace"):
+        fig.text(0.5, 0.5, r"$\beta_0 + x$", family=family)
+    fig.canvas.draw()
+    plt.close(fig)
+
+
+def render_project_bytes(project, fmt="png", dpi=300):
+    """ Render a project to image bytes the same way the Export menu does """
+    fmt = fmt.lower().lstrip(".")
+    if fmt == "svg":
+        buf = io.StringIO()
+        write_svg(project, buf)
+        return buf.getvalue().encode("utf-8")
+    buf = io.BytesIO()
+    if fmt == "pdf":
+        write_pdf(project, buf)
+    else:
+        fig = build_project_figure(project)
+        fig.subplots_adjust(left=0.01, right=0.99, top=0.99, bottom=0.01)
+        fig.savefig(buf, format=fmt, dpi=dpi, bbox_inches='tight')
+        plt.close(fig)
+    return buf.getvalue()
+
+
+def _render_variant(job):
+    name, project, out_path, dpi = job
+    data = render_project_bytes(project, os.path.splitext(out_path)[1], dpi)
+    with open(out_path, "wb") as f:
+        f.write(data)
+    return name
+
+
+# -----------------------------------------------------------------------------
+# RENDER SERVER
+# `glmappy_b1.py --serve` keeps a pool of warmed render workers behind a
+# localhost HTTP endpoint:
+#   POST /render?format=png&dpi=300   body: project JSON (save_project schema)
+#   GET  /metrics                     latency / throughput counters as JSON
+# Malformed bodies and out-of-range dpi get a 400; a render that overruns the
+# timeout gets a 504 and its worker process is killed and replaced.
+# -----------------------------------------------------------------------------
+CONTENT_TYPES = {"png": "image/png", "svg": "image/svg+xml", "pdf": "application/pdf",
+                 "eps": "application/postscript", "tiff": "image/tiff", "jpg": "image/jpeg", "jpeg": "image/jpeg"}
+
+
+MAX_RENDER_DPI = 1200
+MAX_RENDER_PIXELS = 100_000_000  # ~400 MB of RGBA per raster render
+
+
+class RenderQueueFull(Exception):
+    pass
+
+
+def check_render_project(project, fmt="png", dpi=300):
+    """ Validate a render request up front (a bad body is the client's fault, not a worker crash);
+    returns the project with node/edge defaults filled in """
+    if not isinstance(project, dict):
+        raise ValueError("project must be a JSON object")
+    for key in ("nodes", "edges", "plates"):
+        items = project.get(key, [])
+        if not isinstance(items, list) or not all(isinstance(item, dict) for item in items):
+            raise ValueError(f"'{key}' must be a list of objects")
+    settings = project.get("settings", {})
+    if not isinstance(settings, dict):
+        raise ValueError("'settings' must be an object")
+    errors = _check_numbers("Settings", settings, {"canvas_width", "canvas_height", "font_size"})
+    if not mcolors.is_color_like(settings.get("font_color", "black")):
+        errors.append(f"Settings: unknown font colour '{settings.get('font_color')}'")
+    nodes = [dict(NODE_DEFAULTS, **n) for n in project.get("nodes", [])]
+    edges = [dict(EDGE_DEFAULTS, **e) for e in project.get("edges", [])]
+    errors += validate_import([], nodes, edges)
+    plates = []
+    for p in project.get("plates", []):
+        rect = p.get('rect')
+        if not (isinstance(rect, list) and len(rect) == 4 and all(map(_is_finite_number, rect))):
+            errors.append(f"Plate '{p.get('label', '')}': rect must be four finite numbers")
+        plate = dict({'label': "", 'position': "bottom left"}, **p)
+        if plate['position'] not in PLATE_POSITIONS:
+            errors.append(f"Plate '{plate['label']}': position must be one of {', '.join(PLATE_POSITIONS)}")
+        if not isinstance(plate['label'], str):
+            errors.append(f"Plate label {plate['label']!r} must be a string")
+        plates.append(plate)
+    if errors:
+        raise ValueError("; ".join(errors[:10]) + (f" (+{len(errors) - 10} more)" if len(errors) > 10 else ""))
+
+    if fmt not in ("svg", "pdf"):
+        if not 10 <= dpi <= MAX_RENDER_DPI:
+            raise ValueError(f"dpi must be between 10 and {MAX_RENDER_DPI}")
+        inches = grid_unit_for(settings.get("canvas_unit", "in")) / 2.54 * dpi
+        pixels = settings.get("canvas_width", 10.0) * inches * settings.get("canvas_height", 10.0) * inches
+        if pixels > MAX_RENDER_PIXELS:
+            raise ValueError(f"canvas at {dpi:g} dpi is {pixels / 1e6:.0f} Mpx; the limit is {MAX_RENDER_PIXELS // 10 ** 6} Mpx")
+    return dict(project, nodes=nodes, edges=edges, plates=plates)
+
+
+def _render_worker_main(conn):
+    """ Body of a render worker process: warm up, then render (project, fmt, dpi) jobs until told to stop """
+    _init_render_worker()
+    conn.send("ready")
+    while True:
+        job = conn.recv()
+        if job is None:
+            break
+        try:
+            conn.send(("ok", render_project_bytes(*job)))
+        except Exception as e:
+            conn.send(("error", f"{type(e).__name__}: {e}"))
+
+
+class _RenderWorker:
+    """ One dedicated render process; unlike a pool worker it can be killed when a render overruns """
+
+    def __init__(self, ctx):
+        self.conn, child = ctx.Pipe()
+        self.process = ctx.Process(target=_render_worker_main, args=(child,), daemon=True)
+        self.process.start()
+        child.close()
+
+    def wait_ready(self):
+        self.conn.recv()
+        return self
+
+    def kill(self):
+        self.process.terminate()
+        self.process.join(5)
+        self.conn.close()
+
+
+class RenderService:
+    """ Pre-warmed render processes with bounded queueing, per-render timeouts and metrics.
+    A render that overruns its timeout has its worker killed and replaced, so it cannot hold up later requests. """
+
+    def __init__(self, workers=None, max_queue=64, timeout=30.0):
+        if workers is None:
+            workers = max(1, (os.cpu_count() or 2) - 1)
+        self.workers = workers
+        self.timeout = timeout
+        self._ctx = multiprocessing.get_context("spawn")
+        self._idle = queue.Queue()
+        self._live = set()
+        self._closed = False
+        # start every worker now so the first requests don't pay the import/warm-up cost
+        for worker in [_RenderWorker(self._ctx) for _ in range(workers)]:
+            self._live.add(worker.wait_ready())
+            self._idle.put(worker)
+        self._slots = threading.BoundedSemaphore(workers + max_queue)
+        self._lock = threading.Lock()
+        self._latencies = deque(maxlen=1000)
+        self._started = time.perf_counter()
+        self._in_flight = 0
+        self._counts = {"ok": 0, "errors": 0, "timeouts": 0, "rejected": 0, "recycled": 0}
+
+    def _replace(self, worker):
+        """ Kill a stuck or dead worker and start a warmed replacement in the background """
+        worker.kill()
+        with self._lock:
+            self._live.discard(worker)
+            self._counts["recycled"] += 1
+
+        def start():
+            fresh = _RenderWorker(self._ctx).wait_ready()
+            with self._lock:
+                if self._closed:
+                    fresh.kill()
+                    return
+                self._live.add(fresh)
+            self._idle.put(fresh)
+        threading.Thread(target=start, daemon=True).start()
+
+    def render(self, project, fmt="png", dpi=300):
+        if not self._slots.acquire(blocking=False):
+            with self._lock:
+                self._counts["rejected"] += 1
+            raise RenderQueueFull(f"Render queue is full ({self.workers} workers busy)")
+        t0 = time.perf_counter()
+        with self._lock:
+            self._in_flight += 1
+        outcome = "errors"
+        try:
+            worker = self._idle.get()
+            # the timeout covers the render itself, not the wait for a free worker
+            try:
+                worker.conn.send((project, fmt, dpi))
+                ready = worker.conn.poll(self.timeout)
+                status, payload = worker.conn.recv() if ready else (None, None)
+            except (EOFError, OSError):
+                self._replace(worker)
+                raise RuntimeError("render worker exited unexpectedly")
+            if not ready:
+                outcome = "timeouts"
+                self._replace(worker)
+                raise TimeoutError(f"render timed out after {self.timeout} s")
+            self._idle.put(worker)
+            if status != "ok":
+                raise RuntimeError(payload)
+            outcome = "ok"
+            return payload
+        finally:
+            with self._lock:
+                self._in_flight -= 1
+                self._counts[outcome] += 1
+                if outcome == "ok":
+                    self._latencies.append(time.perf_counter() - t0)
+            self._slots.release()
+
+    def metrics(self):
+        with self._lock:
+            lat = sorted(self._latencies)
+            uptime = time.perf_counter() - self._started
+
+            def pct(q):
+                return round(lat[min(len(lat) - 1, int(q * len(lat)))] * 1000.0, 2) if lat else None
+            return {"workers": self.workers, "in_flight": self._in_flight, "uptime_s": round(uptime, 1),
+                    **self._counts, "throughput_rps": round(self._counts["ok"] / uptime, 3) if uptime else 0.0,
+                    "latency_ms": {"p50": pct(0.50), "p95": pct(0.95), "max": pct(1.0)}}
+
+    def close(self):
+        with self._lock:
+            self._closed = True
+            workers = list(self._live)
+            self._live.clear()
+        for worker in workers:
+            worker.kill()
+
+
+class _RenderRequestHandler(BaseHTTPRequestHandler):
+    server_version = "GLMapPy"
+
+    def _reply(self, status, body, content_type="application/json"):
+        if isinstance(body, (dict, list)):
+            body = json.dumps(body).encode("utf-8")
+        elif isinstance(body, str):
+            body = body.encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", content_type)
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def do_GET(self):
+        path = urlparse(self.path).path
+        if path == "/metrics":
+            self._reply(200, self.server.service.metrics())
+        elif path == "/health":
+            self._reply(200, {"status": "ok"})
+        else:
+            self._reply(404, {"error": "not found"})
+
+    def do_POST(self):
+        url = urlparse(self.path)
+        if url.path != "/render":
+            self._reply(404, {"error": "not found"})
+            return
+        query = parse_qs(url.query)
+        fmt = query.get("format", ["png"])[0].lower()
+        if fmt not in CONTENT_TYPES:
+            self._reply(400, {"error": f"unsupported format '{fmt}'"})
+            return
+        try:
+            dpi = float(query.get("dpi", ["300"])[0])
+            project = json.loads(self.rfile.read(int(self.headers.get("Content-Length", 0))))
+            project = check_render_project(project, fmt, dpi)
+        except ValueError as e:
+            self._reply(400, {"error": f"bad request: {e}"})
+            return
+        try:
+            data = self.server.service.render(project, fmt, dpi)
+        except RenderQueueFull as e:
+            self._reply(503, {"error": str(e)})
+        except TimeoutError as e:
+            self._reply(504, {"error": str(e)})
+        except Exception as e:
+            self._reply(500, {"error": f"render failed: {e}"})
+        else:
+            self._reply(200, data, CONTENT_TYPES[fmt])
+
+    def log_message(self, format, *args):
+        pass
+
+
+def serve(host="127.0.0.1", port=8765, workers=None, timeout=30.0, max_queue=64):
+    service = RenderService(workers=workers, max_queue=max_queue, timeout=timeout)
+    httpd = ThreadingHTTPServer((host, port), _RenderRequestHandler)
+    httpd.service = service
+    print(f"GLMapPy render server on http://{host}:{httpd.server_address[1]} ({service.workers} workers)")
+    try:
+        httpd.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        httpd.server_close()
+        service.close()
+
+
+# -----------------------------------------------------------------------------
+# PROJECT GALLERY
+# Thumbnails are cached on disk under ~/.glmappy/thumbnails, keyed by a hash
+# of the project file's bytes, so only new or edited projects are re-rendered.
+# -----------------------------------------------------------------------------
+THUMBNAIL_PX = 180
+THUMBNAIL_VERSION = 1  # bump when rendering changes so stale thumbnails are not reused
+
+
+def cache_dir(name):
+    path = os.path.join(os.path.expanduser("~"), ".glmappy", name)
+    os.makedirs(path, exist_ok=True)
+    return path
+
+
+def thumbnail_cache_dir():
+    return cache_dir("thumbnails")
+
+
+def project_content_hash(path):
+    digest = hashlib.sha256(f"v{THUMBNAIL_VERSION}:{THUMBNAIL_PX}:".encode())
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(1 << 16), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def _render_thumbnail(job):
+    project_path, thumb_path = job
+    with open(project_path, "r") as f:
+        project = json.load(f)
+    fig = build_project_figure(project)
+    w, h = fig.get_size_inches()
+    tmp_path = f"{thumb_path}.{os.getpid()}.tmp"
+    fig.savefig(tmp_path, format="png", dpi=THUMBNAIL_PX / max(w, h), facecolor="white")
+    plt.close(fig)
+    os.replace(tmp_path, thumb_path)
+    return thumb_path
+
+
+class ProjectGallery:
+    """ Thumbnail grid over a folder of projects; uncached thumbnails fill in as the workers finish them """
+    columns = 4
+
+    def __init__(self, app, folder):
+        self.app = app
+        self.pool = None
+        self.pending = {}
+        self.images = {}
+        self.tiles = {}
+        self.closed = False
+
+        self.top = tk.Toplevel(app.root)
+        self.top.title(f"Project Gallery - {folder}")
+        self.top.geometry("860x640")
+        self.top.protocol("WM_DELETE_WINDOW", self.close)
+
+        self.status_var = tk.StringVar()
+        ttk.Label(self.top, textvariable=self.status_var, relief="sunken", anchor="w").pack(side=tk.BOTTOM,
+                                                                                            fill=tk.X)
+        scroll = ttk.Scrollbar(self.top, orient=tk.VERTICAL)
+        scroll.pack(side=tk.RIGHT, fill=tk.Y)
+        canvas = tk.Canvas(self.top, yscrollcommand=scroll.set, highlightthickness=0)
+        canvas.pack(side=tk.LEFT, fill=tk.BOTH, expand=True)
+        scroll.config(command=canvas.yview)
+        grid = ttk.Frame(canvas)
+        canvas.create_window(0, 0, window=grid, anchor="nw")
+        grid.bind("<Configure>", lambda event: canvas.config(scrollregion=canvas.bbox("all")))
+
+        cache = thumbnail_cache_dir()
+        files = sorted(f for f in os.listdir(folder) if f.lower().endswith(".json"))
+        misses = []
+        for i, name in enumerate(files):
+            path = os.path.join(folder, name)
+            tile = ttk.Button(grid, text=name, compound=tk.TOP, command=lambda p=path: self.open(p))
+            tile.grid(row=i // self.columns, column=i % self.columns, padx=6, pady=6, sticky="n")
+            self.tiles[path] = tile
+            try:
+                thumb_path = os.path.join(cache, project_content_hash(path) + ".png")
+            except OSError:
+                tile.config(text=f"{name}\n(unreadable)")
+                continue
+            if os.path.exists(thumb_path):
+                self._show(path, thumb_path)
+            else:
+                tile.config(text=f"{name}\n(rendering...)")
+                misses.append((path, thumb_path))
+
+        self.total = len(files)
+        if misses:
+            workers = max(1, min(len(misses), (os.cpu_count() or 2) - 1))
+            self.pool = ProcessPoolExecutor(max_workers=workers, mp_context=multiprocessing.get_context("spawn"),
+                                            initializer=_init_render_worker)
+            for job in misses:
+                self.pending[self.pool.submit(_render_thumbnail, job)] = job[0]
+            self.top.after(100, self._poll)
+        self._update_status()
+
+    def _update_status(self):
+        cached = self.total - len(self.pending)
+        self.status_var.set(f"{self.total} projects - {cached} ready, {len(self.pending)} rendering. "
+                            "Click a thumbnail to open it.")
+
+    def _show(self, path, thumb_path):
+        image = tk.PhotoImage(file=thumb_path)
+        self.images[path] = image
+        self.tiles[path].config(image=image, text=os.path.basename(path))
+
+    def _poll(self):
+        if self.closed: return
+        for future in [f for f in self.pending if f.done()]:
+            path = self.pending.pop(future)
+            try:
+                self._show(path, future.result())
+            except Exception:
+                self.tiles[path].config(text=f"{os.path.basename(path)}\n(render failed)")
+        self._update_status()
+        if self.pending:
+            self.top.after(100, self._poll)
+        else:
+            self.pool.shutdown(wait=False)
+            self.pool = None
+
+    def open(self, path):
+        self.app.open_project_file(path, quiet=True)
+
+    def close(self):
+        self.closed = True
+        if self.pool:
+            self.pool.shutdown(wait=False, cancel_futures=True)
+        self.top.destroy()
+
+
+# -----------------------------------------------------------------------------
+# FIGURE COMPOSER
+# A composition file arranges several projects as lettered panels of one figure:
+#   {"composition": {"layout": "grid", "columns": 2, "gap": 0.15,
+#                    "panels": [{"project": "a.json"}, {"project": "b.json", "label": "b"}]}}
+# "free" layout places each panel at its own "x"/"y" (inches from the top-left).
+# Panels render in parallel and are cached under ~/.glmappy/panels by a hash of
+# the project bytes, so re-exporting after editing one panel re-renders only it.
+# SVG/PDF output stays vector; other formats embed the panels as rasters.
+# -----------------------------------------------------------------------------
+PANEL_CACHE_VERSION = 2  # bump when rendering changes so stale panels are not reused
+COMPOSITION_DEFAULTS = {"layout": "grid", "columns": 2, "gap": 0.15, "label_style": "({})",
+                        "label_font": "sans-serif", "label_size": 12, "label_color": "black"}
+
+
+def load_composition(path):
+    """ Read a composition file; panel project paths are resolved relative to it """
+    with open(path, "r") as f:
+        data = json.load(f)
+    comp = dict(COMPOSITION_DEFAULTS)
+    comp.update(data.get("composition", data))
+    if comp["layout"] not in ("grid", "free"):
+        raise ValueError(f"Unknown composition layout {comp['layout']!r}")
+    if not comp.get("panels"):
+        raise ValueError("Composition has no panels")
+    base = os.path.dirname(os.path.abspath(path))
+    panels = []
+    for i, panel in enumerate(comp["panels"]):
+        panel = {"project": panel} if isinstance(panel, str) else dict(panel)
+        if "project" not in panel:
+            raise ValueError(f"Panel {i + 1} has no 'project' file")
+        panel["project"] = os.path.join(base, panel["project"])
+        panel.setdefault("label", string.ascii_lowercase[i % 26] * (i // 26 + 1))
+        if comp["layout"] == "free" and not ("x" in panel and "y" in panel):
+            raise ValueError(f"Panel {i + 1} needs 'x' and 'y' for a free layout")
+        panels.append(panel)
+    comp["panels"] = panels
+    comp["columns"] = max(1, int(comp["columns"]))
+    return comp
+
+
+def _panel_cache_path(project_path, kind, dpi):
+    # vector scenes are resolution independent, so only raster panels are keyed by dpi
+    digest = hashlib.sha256(f"v{PANEL_CACHE_VERSION}:{kind}:{dpi if kind == 'raster' else ''}:".encode())
+    with open(project_path, "rb") as f:
+        for chunk in iter(lambda: f.read(1 << 16), b""):
+            digest.update(chunk)
+    return os.path.join(cache_dir("panels"), f"{digest.hexdigest()}.{'png' if kind == 'raster' else 'scene'}")
+
+
+def _render_panel(job):
+    """ Worker: render one panel as a PNG ("raster") or a pickled _VectorScene ("vector") into the cache """
+    project_path, kind, dpi, out_path = job
+    with open(project_path, "r") as f:
+        project = json.load(f)
+    if kind == "raster":
+        data = render_project_bytes(project, "png", dpi)
+    else:
+        data = pickle.dumps(_VectorScene(project), protocol=pickle.HIGHEST_PROTOCOL)
+    tmp_path = f"{out_path}.{os.getpid()}.tmp"
+    with open(tmp_path, "wb") as f:
+        f.write(data)
+    os.replace(tmp_path, out_path)
+    return out_path
+
+
+def composition_kind(path):
+    """ "vector" for SVG/PDF output, "raster" for everything else """
+    return "vector" if path.lower().endswith((".svg", ".pdf")) else "raster"
+
+
+def panel_jobs(comp, kind, dpi=300):
+    """ Cache path of every panel, plus the _render_panel jobs for the panels not cached yet """
+    outs = [_panel_cache_path(p["project"], kind, dpi) for p in comp["panels"]]
+    misses = {out: (p["project"], kind, dpi, out) for p, out in zip(comp["panels"], outs) if not os.path.exists(out)}
+    return outs, list(misses.values())
+
+
+def render_panels(jobs, workers=None):
+    """ Render panel jobs in a pool of warmed workers (inline when there is only one) """
+    if len(jobs) == 1:
+        _render_panel(jobs[0])
+    elif jobs:
+        if workers is None:
+            workers = max(1, (os.cpu_count() or 2) - 1)
+        workers = max(1, min(workers, len(jobs)))
+        with ProcessPoolExecutor(max_workers=workers, mp_context=multiprocessing.get_context("spawn"),
+                                 initializer=_init_render_worker) as pool:
+            list(pool.map(_render_panel, jobs))
+
+
+def layout_panels(comp, sizes):
+    """ Top-left corner (points, y down) of each panel's cell and the page size; a cell is label strip + panel """
+    label_h = float(comp["label_size"]) * 1.5
+    gap = float(comp["gap"]) * 72.0
+    if comp["layout"] == "free":
+        corners = [(float(p["x"]) * 72.0, float(p["y"]) * 72.0) for p in comp["panels"]]
+    else:
+        cols = comp["columns"]
+        col_w = [0.0] * cols
+        row_h = [0.0] * (-(-len(sizes) // cols))
+        for i, (w, h) in enumerate(sizes):
+            col_w[i % cols] = max(col_w[i % cols], w)
+            row_h[i // cols] = max(row_h[i // cols], h + label_h)
+        col_x = np.concatenate([[0.0], np.cumsum(np.add(col_w, gap))])
+        row_y = np.concatenate([[0.0], np.cumsum(np.add(row_h, gap))])
+        corners = [(float(col_x[i % cols]), float(row_y[i // cols])) for i in range(len(sizes))]
+    width = max(x + w for (x, _), (w, _) in zip(corners, sizes))
+    height = max(y + label_h + h for (_, y), (_, h) in zip(corners, sizes))
+    return corners, label_h, width, height
+
+
+def _label_scene(comp, texts, corners, height):
+    scene = _VectorScene({"settings": {"font": comp["label_font"], "font_size": comp["label_size"],
+                                       "font_color": comp["label_color"]}})
+    for text, (x, y) in zip(texts, corners):
+        if text:
+            scene._add_text(text, x, height - y, "left", "top")
+    return scene
+
+
+def compose_figure(comp, path, dpi=300, workers=None):
+    """ Render a loaded composition to path; the format follows the extension """
+    t0 = time.perf_counter()
+    outs, jobs = panel_jobs(comp, composition_kind(path), dpi)
+    render_panels(jobs, workers)
+    assemble_composition(comp, outs, path, dpi)
+    return {"panels": len(outs), "rendered": len(jobs), "seconds": time.perf_counter() - t0}
+
+
+def assemble_composition(comp, outs, path, dpi=300):
+    """ Lay the cached panels (outs, in panel order) out on one page and write it to path """
+    fmt = os.path.splitext(path)[1].lower().lstrip(".") or "png"
+    texts = [comp["label_style"].format(p["label"]) if p["label"] else "" for p in comp["panels"]]
+
+    if composition_kind(path) == "vector":
+        scenes = []
+        for out in outs:
+            with open(out, "rb") as f:
+                scenes.append(pickle.load(f))
+        sizes = [(s.bbox[2] - s.bbox[0], s.bbox[3] - s.bbox[1]) for s in scenes]
+        corners, label_h, width, height = layout_panels(comp, sizes)
+        placements = [(s, x - s.bbox[0], height - y - label_h - s.bbox[3]) for s, (x, y) in zip(scenes, corners)]
+        placements.append((_label_scene(comp, texts, corners, height), 0.0, 0.0))
+        if fmt == "svg":
+            with open(path, "w", encoding="utf-8") as f:
+                _write_svg_page(placements, width, height, f)
+        else:
+            with open(path, "wb") as f:
+                _write_pdf_page(placements, width, height, f)
+    else:
+        images = [plt.imread(out) for out in outs]
+        sizes = [(im.shape[1] * 72.0 / dpi, im.shape[0] * 72.0 / dpi) for im in images]
+        corners, label_h, width, height = layout_panels(comp, sizes)
+        fig = plt.figure(figsize=(width / 72.0, height / 72.0), dpi=dpi, facecolor="white")
+        for im, (w, h), (x, y), text in zip(images, sizes, corners, texts):
+            ax = fig.add_axes([x / width, 1.0 - (y + label_h + h) / height, w / width, h / height])
+            ax.imshow(im, interpolation="none")
+            ax.set_axis_off()
+            fig.text(x / width, 1.0 - y / height, text, ha="left", va="top", family=comp["label_font"],
+                     fontsize=comp["label_size"], color=comp["label_color"])
+        save_figure_tiled(fig, path, dpi, bbox_inches=None)
+        plt.close(fig)
+
+
 class DaftGUI:
     def __init__(self, root):
         self.root = root
@@ -43,22 +2001,26 @@ class DaftGUI:
         self.canvas_height = 10.0
         self.canvas_unit = "in"
         self.render_dpi = 100
+        self.export_dpi = 300
         self.zoom_level = 1.0
 
         self.margin_in = 0.5
 
         self.show_grid_var = tk.BooleanVar(value=False)
 
-        self.font_options = ["serif", "sans-serif", "monospace", "Times New Roman", "Arial"]
+        self.font_options = FONT_OPTIONS
         self.unit_options = ["in", "cm", "mm", "px"]
         self.text_color_options = ["black", "white"]
         self.node_shape_options = ["circle", "rectangle"]
 
         self.history = []
         self.redo_stack = []
+        self._containment = None
+        self.selected = set()
+        self._press = None
 
-        self.edge_styles = {"Solid": "-", "Dashed": "--", "Dotted": ":", "Dash-Dot": "-."}
-        self.plate_positions = ["bottom right", "bottom left", "top right", "top left"]
+        self.edge_styles = EDGE_STYLES
+        self.plate_positions = PLATE_POSITIONS
 
         self.control_frame = ttk.Frame(root, padding="10")
         self.control_frame.pack(side=tk.LEFT, fill=tk.Y)
@@ -88,7 +2050,9 @@ class DaftGUI:
 
         self.viewport.bind("<Configure>", self.on_viewport_resize)
         self.paper_label.bind("<Motion>", self.on_mouse_move)
-        self.paper_label.bind("<Button-1>", self.on_canvas_click)
+        self.paper_label.bind("<Button-1>", self.on_press)
+        self.paper_label.bind("<B1-Motion>", self.on_drag)
+        self.paper_label.bind("<ButtonRelease-1>", self.on_release)
 
         self.current_image = None
 
@@ -103,6 +2067,7 @@ class DaftGUI:
         self.root.bind("<Control-p>", lambda event: self.open_final_preview())
         self.root.bind("<equal>", lambda event: self.zoom_in())
         self.root.bind("<minus>", lambda event: self.zoom_out())
+        self.root.bind("<Escape>", lambda event: self.clear_selection())
 
         self._resize_job = None
 
@@ -123,10 +2088,16 @@ class DaftGUI:
         file_menu.add_command(label="New Diagram (Clear)", command=self.clear_all)
         file_menu.add_separator()
         file_menu.add_command(label="Open Project...", command=self.load_project)
+        file_menu.add_command(label="Project Gallery...", command=self.open_gallery)
         file_menu.add_command(label="Save Project As...", accelerator="Ctrl+S", command=self.save_project)
         file_menu.add_separator()
+        file_menu.add_command(label="Save as Template...", command=self.save_template)
+        file_menu.add_command(label="Generate Variants from Template...", command=self.generate_template_variants)
+        file_menu.add_separator()
         file_menu.add_command(label="Export Image As...", command=self.save_export_image)
         file_menu.add_command(label="Preview Export Window...", accelerator="Ctrl+P", command=self.open_final_preview)
+        file_menu.add_command(label="New Figure Composition...", command=self.new_composition)
+        file_menu.add_command(label="Export Figure Composition...", command=self.export_composition)
         file_menu.add_separator()
         file_menu.add_command(label="Generate Python Code", command=self.generate_code)
         file_menu.add_separator()
@@ -136,14 +2107,37 @@ class DaftGUI:
         edit_menu = Menu(menubar, tearoff=0)
         edit_menu.add_command(label="Undo", accelerator="Ctrl+Z", command=self.undo)
         edit_menu.add_command(label="Redo", accelerator="Ctrl+Y", command=self.redo)
+        edit_menu.add_separator()
+        edit_menu.add_command(label="Move Plate Group...", command=self.move_plate_group)
+        edit_menu.add_command(label="Scale Plate Group...", command=self.scale_plate_group)
+        edit_menu.add_command(label="Duplicate Plate Group...", command=self.duplicate_plate_group)
         menubar.add_cascade(label="Edit", menu=edit_menu)
 
         insert_menu = Menu(menubar, tearoff=0)
         insert_menu.add_command(label="Add Node", command=self.add_node)
         insert_menu.add_command(label="Add Edge", command=self.add_edge)
         insert_menu.add_command(label="Add Plate", command=self.add_plate)
+        insert_menu.add_separator()
+        insert_menu.add_command(label="Import Model Formula...", command=self.import_formula)
+        insert_menu.add_command(label="Import Node/Edge Tables...", command=self.import_tables)
         menubar.add_cascade(label="Insert", menu=insert_menu)
 
+        select_menu = Menu(menubar, tearoff=0)
+        select_menu.add_command(label="Select All", command=self.select_all)
+        select_menu.add_command(label="Clear Selection (Esc)", command=self.clear_selection)
+        select_menu.add_separator()
+        for label, mode in [("Align Left", "left"), ("Align Center", "center"), ("Align Right", "right"),
+                            ("Align Top", "top"), ("Align Middle", "middle"), ("Align Bottom", "bottom")]:
+            select_menu.add_command(label=label, command=lambda m=mode: self.align_selection(m))
+        select_menu.add_separator()
+        select_menu.add_command(label="Distribute Horizontally", command=lambda: self.distribute_selection(0))
+        select_menu.add_command(label="Distribute Vertically", command=lambda: self.distribute_selection(1))
+        select_menu.add_separator()
+        select_menu.add_command(label="Move Selection...", command=self.move_selection)
+        select_menu.add_command(label="Scale Selection...", command=self.scale_selection)
+        select_menu.add_command(label="Rotate Selection...", command=self.rotate_selection)
+        menubar.add_cascade(label="Selection", menu=select_menu)
+
         view_menu = Menu(menubar, tearoff=0)
         view_menu.add_command(label="Refresh Plot", command=self.refresh_plot)
         view_menu.add_separator()
@@ -155,6 +2149,7 @@ class DaftGUI:
         menubar.add_cascade(label="View", menu=view_menu)
 
         help_menu = Menu(menubar, tearoff=0)
+        help_menu.add_command(label="Memory Report", command=self.show_memory_report)
         help_menu.add_command(label="About", command=self.show_about)
         menubar.add_cascade(label="Help", menu=help_menu)
 
@@ -163,6 +2158,20 @@ class DaftGUI:
     def show_about(self):
         messagebox.showinfo("About", "GLMapPy Version BETA 1.0\nFixed-Layout Image Buffer Mode\n\nCopyright (c) 2026 Erik Skogsberg-De La O\nLicensed under the MIT License. See LICENSE file in the project root.")
 
+    def show_memory_report(self):
+        report = element_memory_report(self.nodes, self.edges)
+        if not report:
+            messagebox.showinfo("Memory Report", "The diagram has no nodes or edges yet.")
+            return
+        lines = []
+        for kind, r in report.items():
+            lines.append(f"{r['count']} {kind}s: {r['dict_bytes']:.0f} B each as dicts, "
+                         f"{r['record_bytes']:.0f} B each as records "
+                         f"({100 * (1 - r['record_bytes'] / r['dict_bytes']):.0f}% smaller)")
+        n_snapshots = len(self.history) + len(self.redo_stack)
+        lines.append(f"\nUndo/redo history: {n_snapshots} snapshots")
+        messagebox.showinfo("Memory Report", "\n".join(lines))
+
     def zoom_in(self, event=None):
         if self.zoom_level < 5.0:
             self.zoom_level += 0.2
@@ -176,10 +2185,10 @@ class DaftGUI:
     # -------------------------------------------------------------------------
     # SAVE / LOAD
     # -------------------------------------------------------------------------
-    def save_project(self, event=None):
-        data = {
-            "nodes": self.nodes,
-            "edges": self.edges,
+    def get_project_data(self):
+        return {
+            "nodes": plain_elements(self.nodes),
+            "edges": plain_elements(self.edges),
             "plates": self.plates,
             "settings": {
                 "font": self.current_font,
@@ -191,6 +2200,9 @@ class DaftGUI:
                 "show_grid": self.show_grid_var.get()
             }
         }
+
+    def save_project(self, event=None):
+        data = self.get_project_data()
         file_path = filedialog.asksaveasfilename(defaultextension=".json",
                                                  filetypes=[("GLMapPy Project", "*.json"), ("All Files", "*.*")])
         if file_path:
@@ -204,39 +2216,196 @@ class DaftGUI:
     def load_project(self):
         file_path = filedialog.askopenfilename(filetypes=[("GLMapPy Project", "*.json"), ("All Files", "*.*")])
         if file_path:
-            try:
-                with open(file_path, "r") as f:
-                    data = json.load(f)
+            self.open_project_file(file_path)
 
-                self.save_state()
-                self.nodes = data.get("nodes", [])
-                self.edges = data.get("edges", [])
-                self.plates = data.get("plates", [])
-
-                settings = data.get("settings", {})
-                self.current_font = settings.get("font", "serif")
-                self.current_font_size = settings.get("font_size", 12)
-                self.current_font_color = settings.get("font_color", "black")
-                self.canvas_width = settings.get("canvas_width", 10.0)
-                self.canvas_height = settings.get("canvas_height", 10.0)
-                self.canvas_unit = settings.get("canvas_unit", "in")
-                self.show_grid_var.set(settings.get("show_grid", False))
-
-                self.combo_font.set(self.current_font)
-                self.entry_font_size.delete(0, tk.END)
-                self.entry_font_size.insert(0, str(self.current_font_size))
-                self.combo_font_color.set(self.current_font_color)
-
-                self.entry_canvas_w.delete(0, tk.END)
-                self.entry_canvas_w.insert(0, str(self.canvas_width))
-                self.entry_canvas_h.delete(0, tk.END)
-                self.entry_canvas_h.insert(0, str(self.canvas_height))
-                self.combo_unit.set(self.canvas_unit)
+    def open_project_file(self, file_path, quiet=False):
+        try:
+            with open(file_path, "r") as f:
+                data = json.load(f)
 
-                self.refresh_plot()
+            self.save_state()
+            self.nodes = as_nodes(data.get("nodes", []))
+            self.edges = as_edges(data.get("edges", []))
+            self.plates = data.get("plates", [])
+
+            settings = data.get("settings", {})
+            self.current_font = settings.get("font", "serif")
+            self.current_font_size = settings.get("font_size", 12)
+            self.current_font_color = settings.get("font_color", "black")
+            self.canvas_width = settings.get("canvas_width", 10.0)
+            self.canvas_height = settings.get("canvas_height", 10.0)
+            self.canvas_unit = settings.get("canvas_unit", "in")
+            self.show_grid_var.set(settings.get("show_grid", False))
+
+            self.combo_font.set(self.current_font)
+            self.entry_font_size.delete(0, tk.END)
+            self.entry_font_size.insert(0, str(self.current_font_size))
+            self.combo_font_color.set(self.current_font_color)
+
+            self.entry_canvas_w.delete(0, tk.END)
+            self.entry_canvas_w.insert(0, str(self.canvas_width))
+            self.entry_canvas_h.delete(0, tk.END)
+            self.entry_canvas_h.insert(0, str(self.canvas_height))
+            self.combo_unit.set(self.canvas_unit)
+
+            self.refresh_plot()
+            if quiet:
+                self.status_var.set(f"Opened {os.path.basename(file_path)}")
+            else:
                 messagebox.showinfo("Success", "Project loaded successfully.")
+        except Exception as e:
+            messagebox.showerror("Error", f"Failed to load project:\n{e}")
+
+    def open_gallery(self):
+        folder = filedialog.askdirectory(title="Project Folder")
+        if folder:
+            ProjectGallery(self, folder)
+
+    # -------------------------------------------------------------------------
+    # TEMPLATES
+    # -------------------------------------------------------------------------
+    def save_template(self):
+        data = self.get_project_data()
+        data["parameters"] = {}
+        data["repeat"] = []
+        file_path = filedialog.asksaveasfilename(title="Save Template", defaultextension=".json",
+                                                 filetypes=[("GLMapPy Template", "*.json"), ("All Files", "*.*")])
+        if file_path:
+            try:
+                with open(file_path, "w") as f:
+                    json.dump(data, f, indent=4)
+                messagebox.showinfo("Success", f"Template saved to:\n{file_path}\n\n"
+                                               "Edit it to add {{placeholders}} and repeat rules.")
+            except Exception as e:
+                messagebox.showerror("Error", f"Failed to save template:\n{e}")
+
+    def generate_template_variants(self):
+        template_path = filedialog.askopenfilename(title="Open Template",
+                                                   filetypes=[("GLMapPy Template", "*.json"), ("All Files", "*.*")])
+        if not template_path: return
+        table_path = filedialog.askopenfilename(title="Open Parameter Table",
+                                                filetypes=[("CSV", "*.csv"), ("TSV", "*.tsv"), ("All Files", "*.*")])
+        if not table_path: return
+        out_dir = filedialog.askdirectory(title="Output Folder")
+        if not out_dir: return
+        fmt = simpledialog.askstring("Export Format", "Image format (png, pdf, svg, eps, tiff, jpg):",
+                                     initialvalue="png", parent=self.root)
+        if not fmt: return
+        fmt = fmt.strip().lstrip(".").lower()
+
+        try:
+            with open(template_path, "r") as f:
+                template = json.load(f)
+            jobs = []
+            for name, params in read_parameter_table(table_path):
+                project = expand_template(template, params)
+                with open(os.path.join(out_dir, f"{name}.json"), "w") as f:
+                    json.dump(project, f, indent=4)
+                jobs.append((name, project, os.path.join(out_dir, f"{name}.{fmt}"), self.export_dpi))
+            if not jobs:
+                messagebox.showerror("Error", "The parameter table has no rows.")
+                return
+        except Exception as e:
+            messagebox.showerror("Error", f"Variant generation failed:\n{e}")
+            return
+
+        def done(names, failures, seconds):
+            rate = len(names) / seconds if seconds else 0.0
+            self.status_var.set(f"Rendered {len(names)} variants ({rate:.2f} variants/s)")
+            if failures:
+                messagebox.showerror("Error", f"{len(failures)} of {len(jobs)} variants failed to render:\n"
+                                              f"{failures[0]}")
+            else:
+                messagebox.showinfo("Success", f"Rendered {len(names)} variants in {seconds:.1f} s "
+                                               f"({rate:.2f} variants/s) to:\n{out_dir}")
+        self._run_in_background(_render_variant, jobs, "Rendering variants", done)
+
+    def _run_in_background(self, fn, jobs, label, on_done):
+        """ Run fn over jobs in warmed worker processes, polling with after() so the window stays responsive.
+        on_done(results, failures, seconds) is called on the Tk thread once every job has finished. """
+        workers = max(1, min(len(jobs), (os.cpu_count() or 2) - 1))
+        pool = ProcessPoolExecutor(max_workers=workers, mp_context=multiprocessing.get_context("spawn"),
+                                   initializer=_init_render_worker)
+        futures = [pool.submit(fn, job) for job in jobs]
+        t0 = time.perf_counter()
+
+        def poll():
+            finished = sum(f.done() for f in futures)
+            self.status_var.set(f"{label}: {finished} of {len(futures)} done...")
+            if finished < len(futures):
+                self.root.after(100, poll)
+                return
+            pool.shutdown(wait=False)
+            results, failures = [], []
+            for future in futures:
+                try:
+                    results.append(future.result())
+                except Exception as e:
+                    failures.append(e)
+            on_done(results, failures, time.perf_counter() - t0)
+        poll()
+
+    def new_composition(self):
+        paths = filedialog.askopenfilenames(title="Select Panel Projects (in panel order)",
+                                            filetypes=[("GLMapPy Project", "*.json"), ("All Files", "*.*")])
+        if not paths: return
+        columns = simpledialog.askinteger("Figure Composition", "Panels per row:", initialvalue=min(2, len(paths)),
+                                          minvalue=1, parent=self.root)
+        if not columns: return
+        filename = filedialog.asksaveasfilename(title="Save Figure Composition", defaultextension=".json",
+                                                filetypes=[("GLMapPy Composition", "*.json")])
+        if not filename: return
+        base = os.path.dirname(os.path.abspath(filename))
+        comp = dict(COMPOSITION_DEFAULTS, columns=columns,
+                    panels=[{"project": os.path.relpath(p, base)} for p in paths])
+        try:
+            with open(filename, "w") as f:
+                json.dump({"composition": comp}, f, indent=4)
+        except Exception as e:
+            messagebox.showerror("Error", f"Failed to save composition:\n{e}")
+            return
+        if messagebox.askyesno("Figure Composition", "Composition saved. Export it now?"):
+            self.export_composition(filename)
+
+    def export_composition(self, comp_path=None):
+        if not comp_path:
+            comp_path = filedialog.askopenfilename(title="Open Figure Composition",
+                                                   filetypes=[("GLMapPy Composition", "*.json"), ("All Files", "*.*")])
+        if not comp_path: return
+        file_types = [('PNG', '*.png'), ('PDF', '*.pdf'), ('SVG', '*.svg'), ('EPS', '*.eps'), ('TIFF', '*.tiff'),
+                      ('JPG', '*.jpg'), ('All', '*.*')]
+        filename = filedialog.asksaveasfilename(title="Export Figure", filetypes=file_types, defaultextension=".pdf")
+        if not filename: return
+        if not filename.lower().endswith((".svg", ".pdf")):
+            dpi = simpledialog.askinteger("Export Resolution", "Resolution (dpi):", initialvalue=self.export_dpi,
+                                          minvalue=36, maxvalue=9600, parent=self.root)
+            if not dpi: return
+            self.export_dpi = dpi
+        dpi = self.export_dpi
+        t0 = time.perf_counter()
+        try:
+            comp = load_composition(comp_path)
+            outs, jobs = panel_jobs(comp, composition_kind(filename), dpi)
+        except Exception as e:
+            messagebox.showerror("Error", f"Figure composition failed:\n{e}")
+            return
+
+        def assemble(_, failures, _seconds):
+            if failures:
+                messagebox.showerror("Error", f"Figure composition failed:\n{failures[0]}")
+                return
+            try:
+                assemble_composition(comp, outs, filename, dpi)
             except Exception as e:
-                messagebox.showerror("Error", f"Failed to load project:\n{e}")
+                messagebox.showerror("Error", f"Figure composition failed:\n{e}")
+                return
+            self.status_var.set(f"Composed {len(outs)} panels ({len(jobs)} rendered, "
+                                f"{len(outs) - len(jobs)} cached) in {time.perf_counter() - t0:.1f} s")
+            messagebox.showinfo("Success", f"Figure exported to:\n{filename}")
+        if jobs:
+            self._run_in_background(_render_panel, jobs, "Rendering panels", assemble)
+        else:
+            assemble([], [], 0.0)
 
     # -------------------------------------------------------------------------
     # LAYOUT & INTERACTION
@@ -257,15 +2426,12 @@ class DaftGUI:
         self.viewport.config(scrollregion=self.viewport.bbox("all"))
 
     def get_grid_unit(self):
-        if self.canvas_unit == "cm":
-            return 1 / 2.54
-        elif self.canvas_unit == "mm":
-            return 1 / 25.4
-        elif self.canvas_unit == "px":
-            return 1 / 100.0
-        return 1.0
+        return grid_unit_for(self.canvas_unit)
 
     def get_coords_from_event(self, event):
+        return self.get_coords_from_xy(event.x, event.y)
+
+    def get_coords_from_xy(self, px, py):
         if not self.current_image: return 0, 0
 
         g_unit = self.get_grid_unit()
@@ -275,10 +2441,10 @@ class DaftGUI:
 
         margin_px = self.margin_in * effective_dpi
 
-        x_graph = (event.x - margin_px) / scale_px_per_unit
+        x_graph = (px - margin_px) / scale_px_per_unit
 
         img_h = self.current_image.height()
-        y_from_bottom = img_h - event.y
+        y_from_bottom = img_h - py
         y_graph = (y_from_bottom - margin_px) / scale_px_per_unit
 
         return x_graph, y_graph
@@ -301,6 +2467,71 @@ class DaftGUI:
         self.entry_plate_y.insert(0, f"{y:.1f}")
         self.status_var.set(f"Set Input to: X={x:.1f}, Y={y:.1f}")
 
+    def on_press(self, event):
+        self._press = (event.x, event.y, bool(event.state & 0x0001))
+
+    def on_drag(self, event):
+        if not self._press or not self.current_image: return
+        x0, y0 = self.get_coords_from_xy(*self._press[:2])
+        x1, y1 = self.get_coords_from_event(event)
+        self.status_var.set(f"Selecting X={min(x0, x1):.2f}..{max(x0, x1):.2f}, Y={min(y0, y1):.2f}..{max(y0, y1):.2f}")
+
+    def on_release(self, event):
+        if not self._press: return
+        px, py, shift = self._press
+        self._press = None
+        if abs(event.x - px) < 4 and abs(event.y - py) < 4:
+            if shift:
+                self.toggle_node_at(event)
+            else:
+                self.on_canvas_click(event)
+                if self.selected:
+                    self.clear_selection()
+            return
+        # rubber band
+        x0, y0 = self.get_coords_from_xy(px, py)
+        x1, y1 = self.get_coords_from_event(event)
+        rect = [min(x0, x1), min(y0, y1), abs(x1 - x0), abs(y1 - y0)]
+        hits = {self.nodes[i]['name'] for i in self.get_containment().nodes_in_rect(rect)}
+        self.selected = (self.selected | hits) if shift else hits
+        self.refresh_plot()
+        self.status_var.set(f"{len(self.selected)} nodes selected")
+
+    def toggle_node_at(self, event):
+        x, y = self.get_coords_from_event(event)
+        best, best_d = None, None
+        for n in self.nodes:
+            d = math.hypot(n['x'] - x, n['y'] - y)
+            if d <= 0.5 * n['scale'] * max(1.0, n.get('aspect', 1.0)) and (best_d is None or d < best_d):
+                best, best_d = n['name'], d
+        if best is None: return
+        self.selected ^= {best}
+        self.refresh_plot()
+        self.status_var.set(f"{len(self.selected)} nodes selected")
+
+    def select_all(self):
+        self.selected = {n['name'] for n in self.nodes}
+        self.refresh_plot()
+
+    def clear_selection(self):
+        if not self.selected: return
+        self.selected = set()
+        self.refresh_plot()
+
+    def _draw_selection(self, ax):
+        """ Preview-only highlight; exports never include it """
+        if not self.selected or not ax: return
+        for n in self.nodes:
+            if n['name'] not in self.selected: continue
+            w = n['scale'] * n.get('aspect', 1.0) + 0.15
+            h = n['scale'] + 0.15
+            if n.get('shape', 'circle') == 'rectangle':
+                patch = Rectangle((n['x'] - w / 2, n['y'] - h / 2), w, h)
+            else:
+                patch = Ellipse((n['x'], n['y']), w, h)
+            patch.set(fill=False, edgecolor="#1f77b4", linestyle="--", linewidth=1.5, zorder=10)
+            ax.add_patch(patch)
+
     def on_window_resize(self, event):
         if self._resize_job:
             self.root.after_cancel(self._resize_job)
@@ -319,6 +2550,7 @@ class DaftGUI:
         self._populate_pgm(pgm)
         pgm.render()
         self._draw_manual_components(pgm)
+        self._draw_selection(pgm.ax)
 
         if pgm.ax:
             try:
@@ -376,79 +2608,13 @@ class DaftGUI:
     # DAFT HELPERS
     # -------------------------------------------------------------------------
     def _populate_pgm(self, pgm):
-        for p in self.plates:
-            pgm.add_plate(daft.Plate(p['rect'], label=p['label'], position=p['position']))
-
-        for n in self.nodes:
-            fill = n.get('fill', 'white')
-            if n['observed'] and fill == 'white': fill = "0.95"
-            shape = n.get('shape', 'circle')
-            aspect = n.get('aspect', 1.0)
-            lw = float(n['linewidth'])
-            plot_params = {'linewidth': lw, 'facecolor': fill, 'edgecolor': 'black'}
-            pgm.add_node(daft.Node(n['name'], n['label'], n['x'], n['y'],
-                                   scale=n['scale'], aspect=aspect, shape=shape,
-                                   observed=n['observed'], plot_params=plot_params))
-
-        for e in self.edges:
-            is_curved = (e.get('rad', 0.0) != 0.0 and e['source'] != e['target'])
-            edge_color = e.get('color', 'black')
-            if not edge_color: edge_color = 'black'
-            if is_curved:
-                line_code = self.edge_styles.get(e['style'], "-")
-                params = {"head_width": e.get('head_width', 0.45), "head_length": e.get('head_length', 0.45),
-                          "color": edge_color, "ec": edge_color, "fc": edge_color}
-                if line_code != "-": params["linestyle"] = line_code
-                params["connectionstyle"] = f"arc3, rad={e.get('rad')}"
-                pgm.add_edge(e['source'], e['target'], plot_params=params)
-            else:
-                pass
+        populate_pgm(pgm, self.nodes, self.edges, self.plates)
 
     def _draw_manual_components(self, pgm):
-        node_lookup = {n['name']: n for n in self.nodes}
-        for e in self.edges:
-            is_curved = (e.get('rad', 0.0) != 0.0 and e['source'] != e['target'])
-            if not is_curved:
-                self.draw_manual_edge(pgm.ax, e, node_lookup)
+        draw_manual_components(pgm.ax, self.nodes, self.edges)
 
     def draw_manual_edge(self, ax, edge, node_lookup):
-        node_a = node_lookup.get(edge['source'])
-        node_b = node_lookup.get(edge['target'])
-        if not node_a or not node_b: return
-
-        gap_start = edge.get('gap_start', 0.1)
-        gap_end = edge.get('gap_end', 0.1)
-        line_code = self.edge_styles.get(edge['style'], "-")
-        edge_color = edge.get('color', 'black')
-        if not edge_color: edge_color = 'black'
-        arrow_style = "<|-|>" if edge.get('double_head') else "-|>"
-        hw, hl = edge.get('head_width', 0.45), edge.get('head_length', 0.45)
-
-        if edge['source'] == edge['target']:
-            r = 0.4 * node_a['scale']
-            r_start, r_end = r + gap_start, r + gap_end
-            rad = edge.get('rad', 0.0)
-            if rad == 0.0:
-                rad = -2.5
-            else:
-                rad = -abs(rad)
-            phi_start, phi_end = math.radians(120), math.radians(60)
-            start_p = (node_a['x'] + r_start * math.cos(phi_start), node_a['y'] + r_start * math.sin(phi_start))
-            end_p = (node_a['x'] + r_end * math.cos(phi_end), node_a['y'] + r_end * math.sin(phi_end))
-            ax.annotate("", xy=end_p, xytext=start_p,
-                        arrowprops=dict(arrowstyle=f"{arrow_style},head_width={hw},head_length={hl}",
-                                        linestyle=line_code, connectionstyle=f"arc3,rad={rad}", linewidth=1.0,
-                                        shrinkA=0, shrinkB=0, color=edge_color))
-        else:
-            dx, dy = node_b['x'] - node_a['x'], node_b['y'] - node_a['y']
-            theta = math.atan2(dy, dx)
-            r_a = (0.4 * node_a['scale']) + gap_start
-            r_b = (0.4 * node_b['scale']) + gap_end
-            start_p = (node_a['x'] + r_a * math.cos(theta), node_a['y'] + r_a * math.sin(theta))
-            end_p = (node_b['x'] - r_b * math.cos(theta), node_b['y'] - r_b * math.sin(theta))
-            ax.annotate("", xy=end_p, xytext=start_p,
-                        arrowprops=dict(arrowstyle=f"{arrow_style},head_width={hw},head_length={hl}",
-                                        linestyle=line_code, linewidth=1.0, shrinkA=0, shrinkB=0, color=edge_color))
+        draw_manual_edge(ax, edge, node_lookup)
 
     # --- Export & Generate ---
     def open_final_preview(self, event=None):
@@ -472,30 +2638,27 @@ class DaftGUI:
                                                 defaultextension=".png")
         if filename:
             try:
+                if filename.lower().endswith((".svg", ".pdf")):
+                    export_vector(self.get_project_data(), filename)
+                    messagebox.showinfo("Success", f"Image exported to:\n{filename}")
+                    return
+                dpi = simpledialog.askinteger("Export Resolution", "Resolution (dpi):", initialvalue=self.export_dpi,
+                                              minvalue=36, maxvalue=9600, parent=self.root)
+                if not dpi: return
+                self.export_dpi = dpi
                 fig = self.build_final_figure()
                 # Explicitly manage layout for export - tight
                 fig.subplots_adjust(left=0.01, right=0.99, top=0.99, bottom=0.01)
 
-                fig.savefig(filename, dpi=300, bbox_inches='tight')
+                # PNG/TIFF are rendered strip by strip so large posters do not need the whole bitmap in memory
+                save_figure_tiled(fig, filename, dpi=dpi, bbox_inches='tight')
                 plt.close(fig)
                 messagebox.showinfo("Success", f"Image exported to:\n{filename}")
             except Exception as e:
                 messagebox.showerror("Error", f"Export failed:\n{e}")
 
     def build_final_figure(self):
-        plt.rc("font", family=self.current_font, size=self.current_font_size)
-        plt.rc("text", color=self.current_font_color)
-        g_unit = self.get_grid_unit()
-        pgm = daft.PGM(shape=[self.canvas_width, self.canvas_height], origin=[0, 0], grid_unit=g_unit, node_unit=1.0)
-        self._populate_pgm(pgm)
-        pgm.render()
-        self._draw_manual_components(pgm)
-        if pgm.ax:
-            pgm.ax.set_xlim(0, self.canvas_width)
-            pgm.ax.set_ylim(0, self.canvas_height)
-            pgm.ax.set_aspect('equal')
-            pgm.ax.axis('off')
-        return pgm.figure
+        return build_project_figure(self.get_project_data())
 
     # --- Setup Controls ---
     def setup_controls(self):
@@ -676,7 +2839,7 @@ class DaftGUI:
 
     def save_state(self):
         snapshot = {
-            'nodes': copy.deepcopy(self.nodes), 'edges': copy.deepcopy(self.edges),
+            'nodes': snapshot_elements(self.nodes), 'edges': snapshot_elements(self.edges),
             'plates': copy.deepcopy(self.plates), 'font': self.current_font,
             'font_size': self.current_font_size, 'font_color': self.current_font_color,
             'canvas_w': self.canvas_width, 'canvas_h': self.canvas_height, 'unit': self.canvas_unit
@@ -688,7 +2851,7 @@ class DaftGUI:
     def undo(self):
         if not self.history: return
         self.redo_stack.append({
-            'nodes': copy.deepcopy(self.nodes), 'edges': copy.deepcopy(self.edges),
+            'nodes': snapshot_elements(self.nodes), 'edges': snapshot_elements(self.edges),
             'plates': copy.deepcopy(self.plates), 'font': self.current_font,
             'font_size': self.current_font_size, 'font_color': self.current_font_color,
             'canvas_w': self.canvas_width, 'canvas_h': self.canvas_height, 'unit': self.canvas_unit
@@ -699,7 +2862,7 @@ class DaftGUI:
     def redo(self):
         if not self.redo_stack: return
         self.history.append({
-            'nodes': copy.deepcopy(self.nodes), 'edges': copy.deepcopy(self.edges),
+            'nodes': snapshot_elements(self.nodes), 'edges': snapshot_elements(self.edges),
             'plates': copy.deepcopy(self.plates), 'font': self.current_font,
             'font_size': self.current_font_size, 'font_color': self.current_font_color,
             'canvas_w': self.canvas_width, 'canvas_h': self.canvas_height, 'unit': self.canvas_unit
@@ -717,6 +2880,7 @@ class DaftGUI:
         self.canvas_width = state.get('canvas_w', 10.0)
         self.canvas_height = state.get('canvas_h', 10.0)
         self.canvas_unit = state.get('unit', "in")
+        self.selected &= {n['name'] for n in self.nodes}
         self.combo_font.set(self.current_font)
         self.entry_font_size.delete(0, tk.END)
         self.entry_font_size.insert(0, str(self.current_font_size))
@@ -755,13 +2919,13 @@ class DaftGUI:
             name = self.entry_name.get()
             if not name: return
             self.save_state()
-            self.nodes.append({
+            self.nodes.append(NodeRecord({
                 'name': name, 'label': self.entry_label.get(),
                 'x': float(self.entry_x.get()), 'y': float(self.entry_y.get()),
                 'scale': float(self.entry_scale.get()), 'linewidth': float(self.entry_node_lw.get()),
                 'observed': self.var_observed.get(), 'fill': self.entry_node_fill.get(),
                 'shape': self.combo_node_shape.get(), 'aspect': float(self.entry_node_aspect.get())
-            })
+            }))
             self.refresh_plot()
         except ValueError:
             messagebox.showerror("Error", "Inputs must be numbers")
@@ -772,13 +2936,13 @@ class DaftGUI:
             tgt = self.entry_target.get()
             if src and tgt:
                 self.save_state()
-                self.edges.append({
+                self.edges.append(EdgeRecord({
                     'source': src, 'target': tgt, 'style': self.combo_edge_style.get(),
                     'head_width': float(self.entry_head_w.get()), 'head_length': float(self.entry_head_l.get()),
                     'rad': float(self.entry_curvature.get()), 'gap_start': float(self.entry_gap_start.get()),
                     'gap_end': float(self.entry_gap_end.get()), 'double_head': self.var_double_head.get(),
                     'color': self.entry_edge_color.get()
-                })
+                }))
                 self.refresh_plot()
         except ValueError:
             messagebox.showerror("Error", "Inputs must be numbers")
@@ -802,6 +2966,204 @@ class DaftGUI:
         self.plates = []
         self.refresh_plot()
 
+    # BULK IMPORT
+    def import_formula(self):
+        formula = simpledialog.askstring("Import Model Formula", "Formula, e.g. y ~ x1 + x2 + (1 | group):",
+                                         parent=self.root)
+        if not formula: return
+        try:
+            nodes, edges, plates = formula_to_elements(formula)
+        except ValueError as e:
+            messagebox.showerror("Error", f"Could not read formula:\n{e}")
+            return
+        self.commit_import(nodes, edges, plates)
+
+    def import_tables(self):
+        paths = filedialog.askopenfilenames(title="Import Node/Edge Tables",
+                                            filetypes=[("CSV", "*.csv"), ("TSV", "*.tsv"), ("All Files", "*.*")])
+        if not paths: return
+        nodes, edges, errors = [], [], []
+        # nodes and edges are collected separately and only validated once every file is read,
+        # so an edge table may refer to nodes from any table in the same batch, in any order
+        for path in paths:
+            try:
+                n, e, errs = read_element_table(path)
+            except (OSError, UnicodeDecodeError, csv.Error) as ex:
+                n, e, errs = [], [], [f"{os.path.basename(path)}: {ex}"]
+            nodes.extend(n)
+            edges.extend(e)
+            errors.extend(errs)
+        if errors:
+            self._report_import_errors(errors)
+            return
+        self.commit_import(nodes, edges)
+
+    def _report_import_errors(self, errors):
+        shown = "\n".join(errors[:20])
+        if len(errors) > 20:
+            shown += f"\n... and {len(errors) - 20} more"
+        messagebox.showerror("Import Failed", f"Nothing was imported:\n{shown}")
+
+    def commit_import(self, nodes, edges, plates=()):
+        """ Validate a whole batch, then apply it as one undo step with one render """
+        errors = validate_import(self.nodes, nodes, edges, self.node_shape_options)
+        if errors:
+            self._report_import_errors(errors)
+            return
+        # grow the canvas to fit what came in (never shrink it); worked out before anything is changed
+        xs = [n['x'] + 0.5 * n['scale'] * n['aspect'] for n in nodes] + [p['rect'][0] + p['rect'][2] for p in plates]
+        ys = [n['y'] + 0.5 * n['scale'] for n in nodes] + [p['rect'][1] + p['rect'][3] for p in plates]
+        canvas_w = max(self.canvas_width, math.ceil(max(xs) + 0.5)) if xs else self.canvas_width
+        canvas_h = max(self.canvas_height, math.ceil(max(ys) + 0.5)) if ys else self.canvas_height
+
+        self.save_state()
+        self.nodes.extend(as_nodes(nodes))
+        self.edges.extend(as_edges(edges))
+        self.plates.extend(plates)
+        self.canvas_width, self.canvas_height = canvas_w, canvas_h
+        self.entry_canvas_w.delete(0, tk.END)
+        self.entry_canvas_w.insert(0, str(self.canvas_width))
+        self.entry_canvas_h.delete(0, tk.END)
+        self.entry_canvas_h.insert(0, str(self.canvas_height))
+
+        self.refresh_plot()
+        self.status_var.set(f"Imported {len(nodes)} nodes, {len(edges)} edges, {len(plates)} plates.")
+
+    # SELECTION EDITS
+    def _apply_to_selection(self, fn, minimum=1):
+        """ Run fn(xy, half_sizes) -> new xy over the selected nodes as one undo step and one render """
+        idx = [i for i, n in enumerate(self.nodes) if n['name'] in self.selected]
+        if len(idx) < minimum:
+            messagebox.showinfo("Selection", f"Select at least {minimum} node(s) first "
+                                             "(drag a box or Shift+click on the preview).")
+            return
+        xy = np.array([[self.nodes[i]['x'], self.nodes[i]['y']] for i in idx], dtype=float)
+        half = np.array([[0.5 * self.nodes[i]['scale'] * self.nodes[i].get('aspect', 1.0),
+                          0.5 * self.nodes[i]['scale']] for i in idx], dtype=float)
+        new_xy = np.round(fn(xy, half), 4)
+        self.save_state()
+        for i, (x, y) in zip(idx, new_xy.tolist()):
+            self.nodes[i]['x'] = x
+            self.nodes[i]['y'] = y
+        self.refresh_plot()
+
+    def align_selection(self, mode):
+        self._apply_to_selection(lambda xy, half: align_positions(xy, half, mode), minimum=2)
+
+    def distribute_selection(self, axis):
+        self._apply_to_selection(lambda xy, half: distribute_positions(xy, axis), minimum=3)
+
+    def move_selection(self):
+        offset = self._ask_pair("Move Selection", "Move the selected nodes by dx, dy:")
+        if offset is None: return
+        self._apply_to_selection(lambda xy, half: transform_positions(xy, offset=offset))
+
+    def scale_selection(self):
+        factor = simpledialog.askfloat("Scale Selection", "Scale spacing about the selection centre by:",
+                                       parent=self.root, minvalue=0.05)
+        if not factor: return
+        self._apply_to_selection(lambda xy, half: transform_positions(xy, scale=factor), minimum=2)
+
+    def rotate_selection(self):
+        angle = simpledialog.askfloat("Rotate Selection", "Rotate about the selection centre by (degrees, CCW):",
+                                      parent=self.root)
+        if angle is None: return
+        self._apply_to_selection(lambda xy, half: transform_positions(xy, angle_deg=angle), minimum=2)
+
+    # PLATE GROUPS
+    def get_containment(self):
+        """ The index is kept across redraws and synced on use; it is only rebuilt when the diagram's size
+        has changed enough to need a different cell size """
+        if self._containment is None or not self._containment.suits(len(self.nodes) + len(self.plates)):
+            self._containment = ContainmentIndex(self.nodes, self.plates)
+        return self._containment.sync(self.nodes, self.plates)
+
+    def _picked_plate(self):
+        """ Innermost plate under the last clicked point (the plate X / Y inputs) """
+        try:
+            x, y = float(self.entry_plate_x.get()), float(self.entry_plate_y.get())
+        except ValueError:
+            x = y = None
+        hits = self.get_containment().plates_at(x, y) if x is not None else []
+        if not hits:
+            messagebox.showerror("Error", "Click inside a plate first to pick it.")
+            return None
+        return hits[0]
+
+    def _ask_pair(self, title, prompt):
+        text = simpledialog.askstring(title, prompt, parent=self.root)
+        if not text: return None
+        try:
+            dx, dy = [float(v) for v in text.replace(",", " ").split()]
+            return dx, dy
+        except ValueError:
+            messagebox.showerror("Error", "Enter two numbers, e.g. 1.5, -2")
+            return None
+
+    def move_plate_group(self):
+        j = self._picked_plate()
+        if j is None: return
+        offset = self._ask_pair("Move Plate Group", f"Move '{self.plates[j]['label']}' and its contents by dx, dy:")
+        if offset is None: return
+        dx, dy = offset
+        node_ids, plate_ids = self.get_containment().contents(j)
+        self.save_state()
+        for i in node_ids:
+            self.nodes[i]['x'] += dx
+            self.nodes[i]['y'] += dy
+        for k in [j] + plate_ids:
+            self.plates[k]['rect'][0] += dx
+            self.plates[k]['rect'][1] += dy
+        self.refresh_plot()
+
+    def scale_plate_group(self):
+        j = self._picked_plate()
+        if j is None: return
+        factor = simpledialog.askfloat("Scale Plate Group",
+                                       f"Scale '{self.plates[j]['label']}' and its layout about its lower-left corner by:",
+                                       parent=self.root, minvalue=0.05)
+        if not factor: return
+        x0, y0 = self.plates[j]['rect'][:2]
+        node_ids, plate_ids = self.get_containment().contents(j)
+        self.save_state()
+        # positions and plate sizes scale; node sizes stay as drawn
+        for i in node_ids:
+            self.nodes[i]['x'] = x0 + (self.nodes[i]['x'] - x0) * factor
+            self.nodes[i]['y'] = y0 + (self.nodes[i]['y'] - y0) * factor
+        for k in [j] + plate_ids:
+            rx, ry, rw, rh = self.plates[k]['rect']
+            self.plates[k]['rect'] = [x0 + (rx - x0) * factor, y0 + (ry - y0) * factor, rw * factor, rh * factor]
+        self.refresh_plot()
+
+    def duplicate_plate_group(self):
+        j = self._picked_plate()
+        if j is None: return
+        offset = self._ask_pair("Duplicate Plate Group",
+                                f"Place a copy of '{self.plates[j]['label']}' and its contents offset by dx, dy:")
+        if offset is None: return
+        dx, dy = offset
+        node_ids, plate_ids = self.get_containment().contents(j)
+        self.save_state()
+        taken = {n['name'] for n in self.nodes}
+        renamed = {}
+        for i in node_ids:
+            node = NodeRecord(self.nodes[i])
+            renamed[node['name']] = node['name'] = _unique_name(node['name'], taken)
+            node['x'] += dx
+            node['y'] += dy
+            self.nodes.append(node)
+        for k in [j] + plate_ids:
+            plate = copy.deepcopy(self.plates[k])
+            plate['rect'][0] += dx
+            plate['rect'][1] += dy
+            self.plates.append(plate)
+        # edges wholly inside the group are copied onto the renamed nodes
+        for e in list(self.edges):
+            if e['source'] in renamed and e['target'] in renamed:
+                edge = EdgeRecord(e, source=renamed[e['source']], target=renamed[e['target']])
+                self.edges.append(edge)
+        self.refresh_plot()
+
     def generate_code(self):
         code = "import daft\nimport math\nfrom matplotlib import rc\nimport matplotlib.pyplot as plt\n\n"
         code += f'rc("font", family="{self.current_font}", size={self.current_font_size})\n'
@@ -875,6 +3237,20 @@ class DaftGUI:
 
 # runtime
 if __name__ == "__main__":
+    multiprocessing.freeze_support()
+    parser = argparse.ArgumentParser(description="GLMapPy diagram editor")
+    parser.add_argument("--serve", action="store_true", help="run the headless render server instead of the GUI")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--workers", type=int, default=None)
+    parser.add_argument("--timeout", type=float, default=30.0, help="per-request render timeout (s)")
+    args = parser.parse_args()
+    if args.serve:
+        plt.switch_backend("Agg")
+        serve(args.host, args.port, args.workers, args.timeout)
+        sys.exit(0)
+    # only the GUI needs Tk; the server and spawned render workers import this module without a display
+    plt.switch_backend("TkAgg")
     root = tk.Tk()
     app = DaftGUI(root)
     root.mainloop()
\ No newline at end of file